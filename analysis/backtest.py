@@ -0,0 +1,272 @@
+import os
+import time
+from typing import Dict, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+from analysis.candles import Candles
+from analysis.patterns import BEARISH_PATTERNS, BULLISH_PATTERNS, detect_pattern_masks
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+TAKE_PROFITS = [(2.0, 0.5), (3.0, 0.3), (4.0, 0.2)]
+STOP_LOSS_ATR = 1.5
+SIMULATION_CHUNK = 20_000
+
+class Backtester:
+    def __init__(self, config):
+        self.config = config
+    
+    def load_history(self, path: str) -> Optional[Candles]:
+        try:
+            if path.endswith('.parquet'):
+                df = pd.read_parquet(path, columns=OHLCV_COLUMNS)
+            else:
+                df = pd.read_csv(path, usecols=OHLCV_COLUMNS)
+            
+            df = df.sort_values('timestamp').drop_duplicates('timestamp')
+            return Candles(np.ascontiguousarray(df[OHLCV_COLUMNS].to_numpy(dtype=np.float64).T))
+        
+        except Exception as e:
+            logger.error(f"Error loading history from {path}: {e}")
+            return None
+    
+    def find_datasets(self, directory: str) -> Dict[str, Dict[str, str]]:
+        datasets = {}
+        for name in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(name)
+            if ext not in ('.csv', '.parquet') or '_' not in stem:
+                continue
+            market_id, timeframe = stem.rsplit('_', 1)
+            if timeframe in ('5m', '1m'):
+                datasets.setdefault(market_id, {})[timeframe] = os.path.join(directory, name)
+        
+        return {market_id: files for market_id, files in datasets.items() if '5m' in files}
+    
+    def compute_indicators(self, candles: Candles) -> Dict[str, np.ndarray]:
+        close = pd.Series(candles.close)
+        high = pd.Series(candles.high)
+        low = pd.Series(candles.low)
+        volume = pd.Series(candles.volume)
+        
+        def ema(window):
+            return close.ewm(span=window, min_periods=window, adjust=False).mean().to_numpy()
+        
+        # same definitions as ta / IndicatorEngine, evaluated over the whole history at once
+        diff = close.diff()
+        gain = diff.where(diff > 0, 0.0)
+        loss = -diff.where(diff < 0, 0.0)
+        alpha = 1 / self.config.RSI_PERIOD
+        avg_gain = gain.ewm(alpha=alpha, min_periods=self.config.RSI_PERIOD, adjust=False).mean()
+        avg_loss = loss.ewm(alpha=alpha, min_periods=self.config.RSI_PERIOD, adjust=False).mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+        rsi[avg_loss.isna().to_numpy()] = np.nan
+        
+        prev_close = close.shift(1)
+        true_range = pd.concat(
+            [high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1
+        ).max(axis=1)
+        
+        window = self.config.ATR_PERIOD
+        atr = np.zeros(len(candles))
+        if len(candles) >= window:
+            # Wilder smoothing seeded with the mean of the first window, as an adjust=False EWM
+            seeded = true_range.copy()
+            seeded.iloc[:window - 1] = np.nan
+            seeded.iloc[window - 1] = true_range.iloc[:window].mean()
+            atr[window - 1:] = seeded.ewm(alpha=1 / window, adjust=False).mean().to_numpy()[window - 1:]
+        
+        return {
+            'ema9': ema(self.config.EMA_FAST),
+            'ema21': ema(self.config.EMA_MEDIUM),
+            'ema50': ema(self.config.EMA_SLOW),
+            'rsi': rsi,
+            'atr': atr,
+            'volume_sma': volume.rolling(window=self.config.VOLUME_SMA).mean().to_numpy(),
+            'current_volume': candles.volume
+        }
+    
+    def align_m1_rsi(self, candles_5m: Candles, candles_1m: Candles) -> np.ndarray:
+        rsi_1m = self.compute_indicators(candles_1m)['rsi']
+        
+        # the last 1m bar that closed together with each 5m bar
+        targets = candles_5m.timestamp + 4 * 60_000
+        index = np.searchsorted(candles_1m.timestamp, targets, side='right') - 1
+        
+        aligned = np.full(len(candles_5m), np.nan)
+        valid = index >= 0
+        aligned[valid] = rsi_1m[index[valid]]
+        return aligned
+    
+    def score(self, candles: Candles, indicators: Dict[str, np.ndarray],
+              rsi_1m: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+        ema9, ema21, ema50 = indicators['ema9'], indicators['ema21'], indicators['ema50']
+        rsi = indicators['rsi']
+        price = candles.close
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volume_ratio = indicators['current_volume'] / indicators['volume_sma']
+        volume_points = ((indicators['current_volume'] > indicators['volume_sma']).astype(np.int64) +
+                         (volume_ratio >= 2.0).astype(np.int64))
+        
+        masks = detect_pattern_masks(candles.open, candles.high, candles.low, candles.close)
+        bullish_pattern = np.logical_or.reduce([masks[name] for name in BULLISH_PATTERNS])
+        bearish_pattern = np.logical_or.reduce([masks[name] for name in BEARISH_PATTERNS])
+        
+        if rsi_1m is None:
+            m1_long = m1_short = np.zeros(len(candles), dtype=bool)
+        else:
+            m1_long = rsi_1m > 50
+            m1_short = rsi_1m < 50
+        
+        # mirrors SignalGenerator._evaluate_long/_evaluate_short; S/R has no history and scores 0
+        long_score = ((ema9 > ema21).astype(np.int64) +
+                      (price > ema21) +
+                      ((rsi >= self.config.RSI_LONG_MIN) & (rsi <= self.config.RSI_LONG_MAX)) +
+                      volume_points +
+                      bullish_pattern +
+                      m1_long +
+                      2 * ((ema9 > ema21) & (ema21 > ema50)))
+        
+        short_score = ((ema9 < ema21).astype(np.int64) +
+                       (price < ema21) +
+                       ((rsi >= self.config.RSI_SHORT_MIN) & (rsi <= self.config.RSI_SHORT_MAX)) +
+                       volume_points +
+                       bearish_pattern +
+                       m1_short +
+                       2 * ((ema9 < ema21) & (ema21 < ema50)))
+        
+        return {'long': long_score, 'short': short_score}
+    
+    def select_signals(self, scores: Dict[str, np.ndarray]) -> np.ndarray:
+        # +1 LONG, -1 SHORT, 0 none; same precedence as SignalGenerator.generate_signal
+        min_score = self.config.MIN_SIGNAL_SCORE
+        long_score, short_score = scores['long'], scores['short']
+        
+        direction = np.zeros(long_score.shape, dtype=np.int8)
+        direction[short_score >= min_score] = -1
+        direction[(long_score >= min_score) & (short_score <= long_score)] = 1
+        return direction
+    
+    def simulate_trades(self, candles: Candles, atr: np.ndarray, direction: np.ndarray,
+                        horizon: int) -> Dict[str, np.ndarray]:
+        entries = np.flatnonzero((direction != 0) & (atr > 0))
+        entries = entries[entries < len(candles) - 1]
+        
+        if not entries.size:
+            return {'index': entries, 'timestamp': np.zeros(0), 'direction': entries,
+                    'pnl_pct': np.zeros(0), 'r_multiple': np.zeros(0)}
+        
+        pad = np.full(horizon, np.nan)
+        highs = np.lib.stride_tricks.sliding_window_view(np.concatenate([candles.high, pad]), horizon)
+        lows = np.lib.stride_tricks.sliding_window_view(np.concatenate([candles.low, pad]), horizon)
+        closes = np.concatenate([candles.close, pad])
+        
+        side = direction[entries].astype(np.float64)
+        entry_price = candles.close[entries]
+        risk = atr[entries] * STOP_LOSS_ATR
+        stop = entry_price - side * risk
+        
+        def first_hit(hits):
+            return np.where(hits.any(axis=1), hits.argmax(axis=1), horizon)
+        
+        pnl = np.zeros(entries.size)
+        # chunked so entries x horizon windows stay bounded on long histories
+        for start in range(0, entries.size, SIMULATION_CHUNK):
+            chunk = slice(start, start + SIMULATION_CHUNK)
+            index = entries[chunk]
+            chunk_side = side[chunk, None]
+            
+            # future bars after each entry, flipped for shorts; NaN padding never hits a level
+            adverse = np.where(chunk_side > 0, lows[index + 1], -highs[index + 1])
+            favorable = np.where(chunk_side > 0, highs[index + 1], -lows[index + 1])
+            stop_hit = first_hit(adverse <= chunk_side * stop[chunk, None])
+            exit_close = closes[np.minimum(index + horizon, len(candles) - 1)]
+            
+            for multiple, weight in TAKE_PROFITS:
+                target = entry_price[chunk] + side[chunk] * atr[index] * multiple
+                target_hit = first_hit(favorable >= chunk_side * target[:, None])
+                
+                # a bar touching both levels counts as a stop (pessimistic)
+                exit_price = np.where(
+                    target_hit < stop_hit, target,
+                    np.where(stop_hit < horizon, stop[chunk], exit_close)
+                )
+                pnl[chunk] += weight * side[chunk] * (exit_price - entry_price[chunk])
+        
+        return {
+            'index': entries,
+            'timestamp': candles.timestamp[entries],
+            'direction': direction[entries],
+            'pnl_pct': pnl / entry_price * 100,
+            'r_multiple': pnl / risk
+        }
+    
+    def run_symbol(self, symbol: str, candles_5m: Candles, candles_1m: Optional[Candles] = None,
+                   horizon: Optional[int] = None) -> Dict:
+        horizon = horizon or self.config.BACKTEST_HORIZON_BARS
+        
+        indicators = self.compute_indicators(candles_5m)
+        rsi_1m = self.align_m1_rsi(candles_5m, candles_1m) if candles_1m is not None else None
+        scores = self.score(candles_5m, indicators, rsi_1m)
+        direction = self.select_signals(scores)
+        trades = self.simulate_trades(candles_5m, indicators['atr'], direction, horizon)
+        
+        return {
+            'symbol': symbol,
+            'bars': len(candles_5m),
+            'scores': scores,
+            'trades': trades,
+            'summary': self.summarize(trades)
+        }
+    
+    def run(self, directory: str, horizon: Optional[int] = None) -> Dict[str, Dict]:
+        results = {}
+        
+        for market_id, files in self.find_datasets(directory).items():
+            candles_5m = self.load_history(files['5m'])
+            if candles_5m is None or len(candles_5m) < self.config.EMA_SLOW:
+                continue
+            
+            candles_1m = self.load_history(files['1m']) if '1m' in files else None
+            if candles_1m is None:
+                logger.warning(f"No 1m history for {market_id}, M1 confirmation scores 0")
+            
+            results[market_id] = self.run_symbol(market_id, candles_5m, candles_1m, horizon)
+        
+        return results
+    
+    def run_store(self, store, horizon: Optional[int] = None) -> Dict[str, Dict]:
+        results = {}
+        # leave out bars that were still forming when they were stored
+        closed_before = int(time.time() * 1000) - 300_000
+        
+        for symbol in store.symbols('5m'):
+            candles_5m = store.load_history(symbol, '5m', end=closed_before)
+            if candles_5m is None or len(candles_5m) < self.config.EMA_SLOW:
+                continue
+            
+            candles_1m = store.load_history(symbol, '1m', end=closed_before + 240_000)
+            results[symbol] = self.run_symbol(symbol, candles_5m, candles_1m, horizon)
+        
+        return results
+    
+    def summarize(self, trades: Dict[str, np.ndarray]) -> Dict:
+        count = len(trades['index'])
+        if not count:
+            return {'trades': 0}
+        
+        r_multiple = trades['r_multiple']
+        return {
+            'trades': count,
+            'long': int((trades['direction'] > 0).sum()),
+            'short': int((trades['direction'] < 0).sum()),
+            'win_rate': float((r_multiple > 0).mean() * 100),
+            'avg_r': float(r_multiple.mean()),
+            'total_r': float(r_multiple.sum()),
+            'avg_pnl_pct': float(trades['pnl_pct'].mean())
+        }
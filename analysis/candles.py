@@ -0,0 +1,115 @@
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class Candles:
+    __slots__ = ('data', 'timestamp', 'open', 'high', 'low', 'close', 'volume')
+    
+    def __init__(self, data: np.ndarray):
+        # one contiguous (6, n) block; every field is a zero-copy row view into it
+        self.data = data
+        self.timestamp, self.open, self.high, self.low, self.close, self.volume = data
+    
+    @classmethod
+    def from_ohlcv(cls, ohlcv: list) -> 'Candles':
+        return cls(np.ascontiguousarray(np.asarray(ohlcv, dtype=np.float64)[:, :6].T))
+    
+    def __len__(self) -> int:
+        return self.data.shape[1]
+    
+    def row(self, index: int) -> list:
+        return self.data[:, index].tolist()
+    
+    def candle(self, index: int) -> Dict:
+        return dict(zip(('timestamp', 'open', 'high', 'low', 'close', 'volume'), self.row(index)))
+    
+    def datetime(self, index: int = -1) -> datetime:
+        timestamp = self.timestamp[index] / 1000
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
+
+class CandleBuffer:
+    def __init__(self, timeframe_ms: int, size: int):
+        self.timeframe_ms = timeframe_ms
+        self.size = size
+        self.candles = deque(maxlen=size)
+    
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if not self.candles:
+            return None
+        return self.candles[-1][0]
+    
+    def bars_since_last(self, now_ms: int) -> Optional[int]:
+        if not self.candles:
+            return None
+        current_open = now_ms - now_ms % self.timeframe_ms
+        return (current_open - self.last_timestamp) // self.timeframe_ms
+    
+    def needs_full_refetch(self, now_ms: int) -> bool:
+        if len(self.candles) < self.size:
+            return True
+        
+        missed = self.bars_since_last(now_ms)
+        return missed is None or missed < 0 or missed >= self.size
+    
+    def replace(self, ohlcv: list):
+        self.candles.clear()
+        self.candles.extend(list(c) for c in ohlcv[-self.size:])
+    
+    def restore(self, ohlcv: list) -> bool:
+        # stored rows can span an earlier downtime, so only the newest unbroken run is kept;
+        # a buffer left short is then refilled by needs_full_refetch
+        start = len(ohlcv) - 1
+        while start > 0 and ohlcv[start][0] - ohlcv[start - 1][0] == self.timeframe_ms:
+            start -= 1
+        self.replace(ohlcv[max(start, 0):])
+        return start <= 0
+    
+    def merge(self, ohlcv: list) -> bool:
+        if not self.candles or not ohlcv:
+            return False
+        
+        last_ts = self.last_timestamp
+        new_candles = [c for c in ohlcv if c[0] >= last_ts]
+        if not new_candles:
+            return True
+        
+        expected_ts = last_ts
+        for candle in new_candles:
+            if candle[0] != expected_ts:
+                logger.debug(f"Candle gap: expected {expected_ts}, got {candle[0]}")
+                return False
+            expected_ts += self.timeframe_ms
+        
+        # the cached last bar was still forming, overwrite it with the fresh copy
+        self.candles[-1] = list(new_candles[0])
+        self.candles.extend(list(c) for c in new_candles[1:])
+        return True
+    
+    def apply(self, candle: list) -> bool:
+        last_ts = self.last_timestamp
+        
+        if last_ts is None or candle[0] == last_ts + self.timeframe_ms:
+            self.candles.append(list(candle))
+            return last_ts is not None
+        
+        if candle[0] == last_ts:
+            self.candles[-1] = list(candle)
+        elif candle[0] > last_ts:
+            # missed bars, restart so the window gets refilled from REST
+            logger.debug(f"Candle gap: last {last_ts}, got {candle[0]}")
+            self.candles.clear()
+            self.candles.append(list(candle))
+        
+        return False
+    
+    def is_full(self) -> bool:
+        return len(self.candles) == self.size
+    
+    def to_list(self) -> List[list]:
+        return list(self.candles)
@@ -0,0 +1,179 @@
+import asyncio
+import multiprocessing
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from analysis.metrics import metrics
+from analysis.signals import SignalGenerator
+from analysis.technical import TechnicalAnalyzer
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ('none', 'thread', 'process')
+
+_worker = {}
+
+def _init_worker(config_values: Dict):
+    config = SimpleNamespace(**config_values)
+    _worker['analyzer'] = TechnicalAnalyzer(config)
+    _worker['signal_generator'] = SignalGenerator(config)
+    # stage timings and error counters are shipped back and replayed in the parent
+    metrics.start_capture()
+
+def _analyze_and_score(analyzer, signal_generator, data: Dict) -> Tuple[bool, Optional[Dict], Dict]:
+    analysis = analyzer.analyze(data)
+    if not analysis:
+        return False, None, {}
+    return (True, *signal_generator.evaluate(analysis))
+
+def _score_batch(analyzer, signal_generator, datas: List[Dict]) -> List[Tuple[bool, Optional[Dict], Dict]]:
+    return [
+        (True, *signal_generator.evaluate(analysis)) if analysis else (False, None, {})
+        for analysis in analyzer.analyze_batch(datas)
+    ]
+
+def _worker_analyze(data: Dict):
+    result = _analyze_and_score(_worker['analyzer'], _worker['signal_generator'], data)
+    return result, metrics.drain()
+
+def _worker_analyze_batch(datas: List[Dict]):
+    results = _score_batch(_worker['analyzer'], _worker['signal_generator'], datas)
+    return results, metrics.drain()
+
+def _to_arrays(data: Dict) -> Dict:
+    # numpy blocks pickle far cheaper than lists of lists
+    shipped = dict(data)
+    shipped['ohlcv_5m'] = np.asarray(data['ohlcv_5m'], dtype=np.float64)
+    shipped['ohlcv_1m'] = np.asarray(data['ohlcv_1m'], dtype=np.float64)
+    
+    orderbook = data.get('orderbook')
+    if orderbook:
+        shipped['orderbook'] = {
+            side: np.asarray(orderbook.get(side) or np.empty((0, 2)), dtype=np.float64)[:, :2]
+            for side in ('bids', 'asks')
+        }
+    return shipped
+
+class AnalysisExecutor:
+    def __init__(self, config, analyzer: TechnicalAnalyzer, signal_generator: SignalGenerator):
+        self.config = config
+        self.analyzer = analyzer
+        self.signal_generator = signal_generator
+        self.mode = config.ANALYSIS_EXECUTOR if config.ANALYSIS_EXECUTOR in EXECUTOR_MODES else 'none'
+        self.workers = max(1, config.ANALYSIS_WORKERS)
+        self.thread_pool = None
+        self.shards = []
+        
+        if self.mode == 'thread':
+            self.thread_pool = ThreadPoolExecutor(self.workers, thread_name_prefix='analysis')
+        elif self.mode == 'process':
+            config_values = {name: getattr(config, name) for name in dir(config) if name.isupper()}
+            context = multiprocessing.get_context('spawn')
+            # one single-process pool per shard: a symbol always lands on the same worker,
+            # so its incremental indicator state lives in exactly one place
+            self.shards = [
+                ProcessPoolExecutor(1, mp_context=context, initializer=_init_worker,
+                                    initargs=(config_values,))
+                for _ in range(self.workers)
+            ]
+        
+        logger.info(f"Analysis executor: {self.mode}"
+                    f"{f' ({self.workers} workers)' if self.mode != 'none' else ''}")
+    
+    def _shard(self, symbol: str) -> ProcessPoolExecutor:
+        return self.shards[zlib.crc32(symbol.encode()) % len(self.shards)]
+    
+    async def analyze(self, data: Dict) -> Tuple[bool, Optional[Dict], Dict]:
+        if self.mode == 'none':
+            return _analyze_and_score(self.analyzer, self.signal_generator, data)
+        
+        loop = asyncio.get_running_loop()
+        if self.mode == 'thread':
+            return await loop.run_in_executor(
+                self.thread_pool, _analyze_and_score, self.analyzer, self.signal_generator, data
+            )
+        
+        result, captured = await loop.run_in_executor(
+            self._shard(data['symbol']), _worker_analyze, _to_arrays(data)
+        )
+        metrics.replay(captured)
+        return result
+    
+    async def analyze_batch(self, datas: List[Dict]) -> List[Tuple[bool, Optional[Dict], Dict]]:
+        if self.mode == 'none':
+            return _score_batch(self.analyzer, self.signal_generator, datas)
+        
+        loop = asyncio.get_running_loop()
+        if self.mode == 'thread':
+            return await loop.run_in_executor(
+                self.thread_pool, _score_batch, self.analyzer, self.signal_generator, datas
+            )
+        
+        groups = {}
+        for i, data in enumerate(datas):
+            groups.setdefault(zlib.crc32(data['symbol'].encode()) % len(self.shards), []).append(i)
+        
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(self.shards[shard], _worker_analyze_batch,
+                                 [_to_arrays(datas[i]) for i in indices])
+            for shard, indices in groups.items()
+        ))
+        
+        results = [(False, None, {})] * len(datas)
+        for indices, (batch, captured) in zip(groups.values(), batches):
+            metrics.replay(captured)
+            for i, result in zip(indices, batch):
+                results[i] = result
+        return results
+    
+    def shutdown(self):
+        if self.thread_pool:
+            self.thread_pool.shutdown(wait=False)
+        for shard in self.shards:
+            shard.shutdown(wait=False, cancel_futures=True)
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05, history: int = 2000):
+        self.interval = interval
+        self.lags = deque(maxlen=history)
+        self.task = None
+    
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+    
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+    
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            # anything beyond the requested sleep is time the loop spent busy elsewhere
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.lags.append(lag)
+            metrics.observe('loop_lag', lag)
+    
+    def reset(self):
+        self.lags.clear()
+    
+    def snapshot(self) -> Dict:
+        if not self.lags:
+            return {'samples': 0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+        
+        lags = np.fromiter(self.lags, dtype=np.float64)
+        return {
+            'samples': len(lags),
+            'p50': float(np.percentile(lags, 50)),
+            'p95': float(np.percentile(lags, 95)),
+            'max': float(lags.max())
+        }
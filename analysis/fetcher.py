@@ -1,41 +1,115 @@
 import ccxt.async_support as ccxt
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import logging
 
+from analysis.candles import CandleBuffer
+from analysis.markets import MarketCache
+from analysis.metrics import metrics
+from analysis.ratelimit import TokenBucket
+from analysis.store import CandleStore
+
 logger = logging.getLogger(__name__)
 
 class DataFetcher:
     def __init__(self, config):
         self.config = config
         self.exchange = ccxt.bingx({
-            'enableRateLimit': True,
+            'enableRateLimit': False,
             'options': {'defaultType': 'swap'}
         })
         self.pairs_cache = None
         self.pairs_cache_time = None
+        self.pairs_refresh = None
+        self.market_cache = MarketCache(config) if config.MARKET_CACHE_ENABLED else None
         self.semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_REQUESTS)
+        self.rate_limiter = TokenBucket(config.MAX_REQUESTS_PER_SECOND, config.RATE_LIMIT_BURST)
+        self.candle_buffers = {}
+        self.cache_stats = {'incremental': 0, 'full': 0, 'gaps': 0, 'bars_fetched': 0, 'warm_buffers': 0}
+        self.store = CandleStore(config) if config.CANDLE_STORE_ENABLED else None
+        self.store_flush = None
+        if self.store:
+            self._warm_start()
         
     async def initialize(self):
-        try:
-            await self.exchange.load_markets()
+        cached = self.market_cache.load() if self.market_cache else None
+        if cached:
+            # scanning starts from the saved metadata; an expired pair list is
+            # refreshed in the background by the first get_liquid_pairs call
+            self.exchange.set_markets(cached['markets'])
+            if cached['pairs']:
+                self.pairs_cache = cached['pairs']
+                self.pairs_cache_time = datetime.fromtimestamp(cached['saved_at'])
+            logger.info(f"Exchange initialized from {self.market_cache.path}: "
+                        f"{len(cached['markets'])} markets, {len(cached['pairs'] or [])} liquid pairs")
+        elif await self.get_liquid_pairs():
             logger.info("Exchange initialized successfully")
+        else:
+            logger.error("Failed to initialize exchange")
+    
+    async def load_markets(self):
+        # metadata only, for processes that are handed their pairs
+        cached = self.market_cache.load() if self.market_cache else None
+        try:
+            if cached:
+                self.exchange.set_markets(cached['markets'])
+            else:
+                await self._request('markets', self.exchange.load_markets)
         except Exception as e:
-            logger.error(f"Failed to initialize exchange: {e}")
-            raise
+            logger.error(f"Failed to load markets: {e}")
     
     async def close(self):
+        if self.store:
+            if self.store_flush:
+                await self.store_flush
+            self.store.close()
         await self.exchange.close()
     
+    def _warm_start(self):
+        now_ms = int(time.time() * 1000)
+        gapped = 0
+        
+        for timeframe, limit in self.config.CANDLE_LIMITS.items():
+            timeframe_ms = self.exchange.parse_timeframe(timeframe) * 1000
+            # a buffer whose newest bar is under `limit` bars old is still gap-filled, so its
+            # newest `limit` rows can reach back twice the buffer size; needs_full_refetch
+            # decides per symbol whether the gap is too wide
+            stored = self.store.load_recent(timeframe, limit, now_ms - 2 * (limit + 1) * timeframe_ms)
+            
+            for symbol, ohlcv in stored.items():
+                if not self._get_buffer(symbol, timeframe, limit).restore(ohlcv):
+                    gapped += 1
+            self.cache_stats['warm_buffers'] += len(stored)
+        
+        logger.info(f"Warm start: {self.cache_stats['warm_buffers']} candle buffers loaded from {self.store.path}, "
+                    f"{gapped} cut at a gap")
+    
     async def get_liquid_pairs(self) -> List[str]:
-        if (self.pairs_cache and self.pairs_cache_time and 
-            datetime.now() - self.pairs_cache_time < timedelta(hours=self.config.PAIRS_CACHE_HOURS)):
-            logger.info(f"Using cached pairs: {len(self.pairs_cache)} pairs")
+        if self.pairs_cache and self.pairs_cache_time:
+            if datetime.now() - self.pairs_cache_time < timedelta(hours=self.config.PAIRS_CACHE_HOURS):
+                logger.info(f"Using cached pairs: {len(self.pairs_cache)} pairs")
+                return self.pairs_cache
+            
+            # scans keep the expired list instead of waiting for markets and tickers
+            self._refresh_pairs()
+            logger.info(f"Using expired pairs while refreshing: {len(self.pairs_cache)} pairs")
             return self.pairs_cache
         
+        return await asyncio.shield(self._refresh_pairs())
+    
+    def _refresh_pairs(self) -> asyncio.Task:
+        # one refresh at a time, shared by every caller
+        if self.pairs_refresh is None or self.pairs_refresh.done():
+            self.pairs_refresh = asyncio.create_task(self._fetch_liquid_pairs())
+        return self.pairs_refresh
+    
+    async def _fetch_liquid_pairs(self) -> List[str]:
         try:
-            markets = await self.exchange.fetch_markets()
+            markets = await self._request('markets', self.exchange.fetch_markets)
+            # tick sizes come from the same response, so ccxt never loads markets on its own
+            self.exchange.set_markets(markets)
             
             usdt_futures = [
                 m['symbol'] for m in markets 
@@ -46,22 +120,16 @@ class DataFetcher:
             
             logger.info(f"Found {len(usdt_futures)} USDT-M futures pairs")
             
-            liquid_pairs = []
-            tasks = []
-            
-            for symbol in usdt_futures:
-                tasks.append(self._check_liquidity(symbol))
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for symbol, is_liquid in zip(usdt_futures, results):
-                if is_liquid and not isinstance(is_liquid, Exception):
-                    liquid_pairs.append(symbol)
+            liquid_pairs = await self._filter_liquid_bulk(usdt_futures)
+            if liquid_pairs is None:
+                liquid_pairs = await self._filter_liquid_per_symbol(usdt_futures)
             
             logger.info(f"Filtered to {len(liquid_pairs)} liquid pairs (volume > {self.config.MIN_VOLUME_USDT/1e6}M USDT)")
             
             self.pairs_cache = liquid_pairs
             self.pairs_cache_time = datetime.now()
+            if self.market_cache:
+                self.market_cache.save(markets, liquid_pairs)
             
             return liquid_pairs
             
@@ -69,41 +137,162 @@ class DataFetcher:
             logger.error(f"Error fetching liquid pairs: {e}")
             return []
     
-    async def _check_liquidity(self, symbol: str) -> bool:
-        async with self.semaphore:
-            try:
-                ticker = await self.exchange.fetch_ticker(symbol)
-                volume_usdt = ticker.get('quoteVolume', 0)
-                return volume_usdt >= self.config.MIN_VOLUME_USDT
-            except Exception as e:
-                logger.warning(f"Error checking liquidity for {symbol}: {e}")
-                return False
-    
-    async def fetch_ohlcv_data(self, symbol: str, timeframe: str, limit: int) -> Optional[list]:
-        async with self.semaphore:
-            try:
-                await asyncio.sleep(0.1)
-                ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-                return ohlcv
-            except Exception as e:
-                logger.warning(f"Error fetching OHLCV for {symbol} {timeframe}: {e}")
-                return None
+    async def _filter_liquid_bulk(self, symbols: List[str]) -> Optional[List[str]]:
+        try:
+            tickers = await self.fetch_tickers()
+        except Exception as e:
+            logger.warning(f"Bulk tickers request failed, falling back to per-symbol checks: {e}")
+            return None
+        
+        liquid_pairs = []
+        missing = []
+        
+        for symbol in symbols:
+            ticker = tickers.get(symbol)
+            if ticker is None or ticker.get('quoteVolume') is None:
+                missing.append(symbol)
+            elif ticker['quoteVolume'] >= self.config.MIN_VOLUME_USDT:
+                liquid_pairs.append(symbol)
+        
+        if missing:
+            logger.info(f"Bulk tickers missing {len(missing)} pairs, checking them individually")
+            liquid_pairs.extend(await self._filter_liquid_per_symbol(missing))
+        
+        return liquid_pairs
+    
+    async def _filter_liquid_per_symbol(self, symbols: List[str]) -> List[str]:
+        results = await asyncio.gather(
+            *(self._check_liquidity(symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        return [
+            symbol for symbol, is_liquid in zip(symbols, results)
+            if is_liquid and not isinstance(is_liquid, Exception)
+        ]
     
-    async def fetch_orderbook(self, symbol: str, limit: int = 20) -> Optional[Dict]:
+    async def _request(self, endpoint: str, method, *args, **kwargs):
+        # wait for tokens before taking a concurrency slot so throttling never holds one
+        waited = await self.rate_limiter.acquire(self.config.ENDPOINT_WEIGHTS.get(endpoint, 1))
+        # acquire() always takes a few microseconds; same threshold as TokenBucket.stats
+        if waited > 0.001:
+            metrics.inc('rate_limit_waits_total')
+            metrics.inc('rate_limit_wait_seconds_total', waited)
+        
+        metrics.inc('requests_total', endpoint=endpoint)
         async with self.semaphore:
             try:
-                await asyncio.sleep(0.1)
-                orderbook = await self.exchange.fetch_order_book(symbol, limit=limit)
-                return orderbook
-            except Exception as e:
-                logger.warning(f"Error fetching orderbook for {symbol}: {e}")
-                return None
+                return await method(*args, **kwargs)
+            except (ccxt.RateLimitExceeded, ccxt.DDoSProtection):
+                self.rate_limiter.penalize(self.config.RATE_LIMIT_PENALTY_SECONDS)
+                metrics.inc('rate_limit_penalties_total')
+                metrics.inc('request_errors_total', endpoint=endpoint)
+                raise
+            except Exception:
+                metrics.inc('request_errors_total', endpoint=endpoint)
+                raise
+    
+    async def fetch_tickers(self) -> Dict[str, Dict]:
+        return await self._request('tickers', self.exchange.fetch_tickers, params={'type': 'swap'})
+    
+    async def _check_liquidity(self, symbol: str) -> bool:
+        try:
+            ticker = await self._request('ticker', self.exchange.fetch_ticker, symbol)
+            volume_usdt = ticker.get('quoteVolume', 0)
+            return volume_usdt >= self.config.MIN_VOLUME_USDT
+        except Exception as e:
+            logger.warning(f"Error checking liquidity for {symbol}: {e}")
+            return False
     
-    async def fetch_symbol_data(self, symbol: str) -> Optional[Dict]:
+    async def fetch_ohlcv_data(self, symbol: str, timeframe: str, limit: int,
+                               since: Optional[int] = None) -> Optional[list]:
         try:
-            ohlcv_5m_task = self.fetch_ohlcv_data(symbol, '5m', 100)
-            ohlcv_1m_task = self.fetch_ohlcv_data(symbol, '1m', 20)
-            orderbook_task = self.fetch_orderbook(symbol)
+            return await self._request(
+                'klines', self.exchange.fetch_ohlcv, symbol, timeframe, since=since, limit=limit
+            )
+        except Exception as e:
+            logger.warning(f"Error fetching OHLCV for {symbol} {timeframe}: {e}")
+            return None
+    
+    def _get_buffer(self, symbol: str, timeframe: str, limit: int) -> CandleBuffer:
+        key = (symbol, timeframe)
+        buffer = self.candle_buffers.get(key)
+        if buffer is None or buffer.size != limit:
+            buffer = CandleBuffer(self.exchange.parse_timeframe(timeframe) * 1000, limit)
+            self.candle_buffers[key] = buffer
+        return buffer
+    
+    async def fetch_candles(self, symbol: str, timeframe: str, limit: int) -> Optional[list]:
+        buffer = self._get_buffer(symbol, timeframe, limit)
+        now_ms = int(time.time() * 1000)
+        
+        if not buffer.needs_full_refetch(now_ms):
+            missed = buffer.bars_since_last(now_ms)
+            ohlcv = await self.fetch_ohlcv_data(
+                symbol, timeframe, missed + 1, since=buffer.last_timestamp
+            )
+            if ohlcv and buffer.merge(ohlcv):
+                self.cache_stats['incremental'] += 1
+                self.cache_stats['bars_fetched'] += len(ohlcv)
+                self._persist(symbol, timeframe, ohlcv)
+                return buffer.to_list()
+            
+            self.cache_stats['gaps'] += 1
+            metrics.inc('retries_total', kind='candle_gap')
+            logger.debug(f"Candle gap for {symbol} {timeframe}, refetching full window")
+        
+        ohlcv = await self.fetch_ohlcv_data(symbol, timeframe, limit)
+        if not ohlcv:
+            return None
+        
+        self.cache_stats['full'] += 1
+        self.cache_stats['bars_fetched'] += len(ohlcv)
+        buffer.replace(ohlcv)
+        self._persist(symbol, timeframe, ohlcv)
+        return buffer.to_list()
+    
+    def _persist(self, symbol: str, timeframe: str, ohlcv: list):
+        if self.store:
+            self.store.append(symbol, timeframe, ohlcv)
+            if self.store.flush_due():
+                self.flush_store()
+    
+    def flush_store(self) -> asyncio.Task:
+        # the write runs in a thread, so neither the scan nor the event loop waits on disk
+        if self.store_flush is None or self.store_flush.done():
+            self.store_flush = asyncio.create_task(self.store.flush_async())
+        return self.store_flush
+    
+    def get_tick_size(self, symbol: str) -> Optional[float]:
+        market = (self.exchange.markets or {}).get(symbol)
+        if not market:
+            return None
+        
+        precision = market.get('precision', {}).get('price')
+        if precision is None:
+            return None
+        # bingx markets report price precision as decimal places in ccxt 4.2, not as a tick size
+        mode = getattr(self.exchange, 'precisionMode', ccxt.TICK_SIZE)
+        if mode == ccxt.DECIMAL_PLACES:
+            return 10 ** -int(precision)
+        if mode == ccxt.SIGNIFICANT_DIGITS:
+            return None
+        return precision
+    
+    async def fetch_orderbook(self, symbol: str, limit: Optional[int] = None) -> Optional[Dict]:
+        limit = limit or self.config.ORDERBOOK_DEPTH
+        try:
+            return await self._request('depth', self.exchange.fetch_order_book, symbol, limit=limit)
+        except Exception as e:
+            logger.warning(f"Error fetching orderbook for {symbol}: {e}")
+            return None
+    
+    async def fetch_symbol_data(self, symbol: str, with_orderbook: bool = True) -> Optional[Dict]:
+        start = time.perf_counter()
+        try:
+            ohlcv_5m_task = self.fetch_candles(symbol, '5m', self.config.CANDLE_LIMITS['5m'])
+            ohlcv_1m_task = self.fetch_candles(symbol, '1m', self.config.CANDLE_LIMITS['1m'])
+            orderbook_task = self.fetch_orderbook(symbol) if with_orderbook else asyncio.sleep(0)
             
             ohlcv_5m, ohlcv_1m, orderbook = await asyncio.gather(
                 ohlcv_5m_task, ohlcv_1m_task, orderbook_task
@@ -116,9 +305,39 @@ class DataFetcher:
                 'symbol': symbol,
                 'ohlcv_5m': ohlcv_5m,
                 'ohlcv_1m': ohlcv_1m,
-                'orderbook': orderbook
+                'orderbook': orderbook,
+                'tick_size': self.get_tick_size(symbol)
             }
             
         except Exception as e:
             logger.error(f"Error fetching data for {symbol}: {e}")
             return None
+        finally:
+            metrics.observe('fetch', time.perf_counter() - start)
+    
+    def apply_stream_candle(self, symbol: str, timeframe: str, candle: list) -> bool:
+        buffer = self._get_buffer(symbol, timeframe, self.config.CANDLE_LIMITS[timeframe])
+        closed = buffer.apply(candle)
+        if closed:
+            self._persist(symbol, timeframe, [buffer.candles[-2]])
+        return closed
+    
+    def cached_symbol_data(self, symbol: str, before: Optional[int] = None,
+                           orderbook: Optional[Dict] = None) -> Optional[Dict]:
+        buffer_5m = self.candle_buffers.get((symbol, '5m'))
+        buffer_1m = self.candle_buffers.get((symbol, '1m'))
+        
+        if not buffer_5m or not buffer_1m or not buffer_5m.is_full() or not buffer_1m.is_full():
+            return None
+        
+        ohlcv_5m = buffer_5m.to_list()
+        if before is not None:
+            ohlcv_5m = [c for c in ohlcv_5m if c[0] < before]
+        
+        return {
+            'symbol': symbol,
+            'ohlcv_5m': ohlcv_5m,
+            'ohlcv_1m': buffer_1m.to_list(),
+            'orderbook': orderbook,
+            'tick_size': self.get_tick_size(symbol)
+        }
@@ -0,0 +1,260 @@
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from analysis.candles import Candles
+
+NAN = float('nan')
+
+class EMAState:
+    __slots__ = ('window', 'alpha', 'value', 'count')
+    
+    def __init__(self, window: int):
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.value = None
+        self.count = 0
+    
+    def _next(self, x: float) -> float:
+        if self.value is None:
+            return x
+        return self.alpha * x + (1 - self.alpha) * self.value
+    
+    def update(self, x: float):
+        self.value = self._next(x)
+        self.count += 1
+    
+    def peek(self, x: float) -> float:
+        if self.count + 1 < self.window:
+            return NAN
+        return self._next(x)
+
+class RSIState:
+    __slots__ = ('window', 'alpha', 'prev_close', 'avg_gain', 'avg_loss', 'count')
+    
+    def __init__(self, window: int):
+        self.window = window
+        self.alpha = 1 / window
+        self.prev_close = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.count = 0
+    
+    def _next(self, close: float):
+        # like ta, the undefined first diff counts as a zero gain/loss observation
+        if self.prev_close is None:
+            return 0.0, 0.0
+        diff = close - self.prev_close
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+        return (self.alpha * gain + (1 - self.alpha) * self.avg_gain,
+                self.alpha * loss + (1 - self.alpha) * self.avg_loss)
+    
+    def update(self, close: float):
+        self.avg_gain, self.avg_loss = self._next(close)
+        self.prev_close = close
+        self.count += 1
+    
+    def peek(self, close: float) -> float:
+        if self.count + 1 < self.window:
+            return NAN
+        avg_gain, avg_loss = self._next(close)
+        if avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+class ATRState:
+    __slots__ = ('window', 'prev_close', 'seed', 'value', 'count')
+    
+    def __init__(self, window: int):
+        self.window = window
+        self.prev_close = None
+        self.seed = 0.0
+        self.value = None
+        self.count = 0
+    
+    def _true_range(self, high: float, low: float) -> float:
+        if self.prev_close is None:
+            return high - low
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+    
+    def _next(self, high: float, low: float):
+        tr = self._true_range(high, low)
+        if self.count + 1 < self.window:
+            return self.seed + tr, None
+        if self.count + 1 == self.window:
+            return self.seed + tr, (self.seed + tr) / self.window
+        return self.seed, (self.value * (self.window - 1) + tr) / self.window
+    
+    def update(self, high: float, low: float, close: float):
+        self.seed, self.value = self._next(high, low)
+        self.prev_close = close
+        self.count += 1
+    
+    def peek(self, high: float, low: float) -> float:
+        _, value = self._next(high, low)
+        return 0.0 if value is None else value
+
+class SMAState:
+    __slots__ = ('window', 'values', 'total')
+    
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+    
+    def update(self, x: float):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+    
+    def peek(self, x: float) -> float:
+        if len(self.values) + 1 < self.window:
+            return NAN
+        if len(self.values) == self.window:
+            return (self.total - self.values[0] + x) / self.window
+        return (self.total + x) / self.window
+
+class IndicatorState:
+    def __init__(self, config):
+        self.ema_fast = EMAState(config.EMA_FAST)
+        self.ema_medium = EMAState(config.EMA_MEDIUM)
+        self.ema_slow = EMAState(config.EMA_SLOW)
+        self.rsi = RSIState(config.RSI_PERIOD)
+        self.atr = ATRState(config.ATR_PERIOD)
+        self.volume_sma = SMAState(config.VOLUME_SMA)
+        self.last_timestamp = None
+    
+    def update(self, candle: list):
+        timestamp, _, high, low, close, volume = candle[:6]
+        self.ema_fast.update(close)
+        self.ema_medium.update(close)
+        self.ema_slow.update(close)
+        self.rsi.update(close)
+        self.atr.update(high, low, close)
+        self.volume_sma.update(volume)
+        self.last_timestamp = timestamp
+    
+    def snapshot(self, candle: list) -> Dict:
+        _, _, high, low, close, volume = candle[:6]
+        return {
+            'ema9': self.ema_fast.peek(close),
+            'ema21': self.ema_medium.peek(close),
+            'ema50': self.ema_slow.peek(close),
+            'rsi': self.rsi.peek(close),
+            'atr': self.atr.peek(high, low),
+            'volume_sma': self.volume_sma.peek(volume),
+            'current_volume': volume
+        }
+
+class IndicatorEngine:
+    def __init__(self, config):
+        self.config = config
+        self.states = {}
+        self.stats = {'reseeds': 0, 'bars_applied': 0}
+    
+    def update(self, key, candles: Candles) -> Optional[Dict]:
+        if not len(candles):
+            return None
+        
+        closed_count = len(candles) - 1
+        state = self.states.get(key)
+        
+        # a continued state follows ta over the full history seen since it was seeded, while a
+        # reseeded one equals ta over this window only; the recursive EMA50/RSI/ATR start values
+        # differ, by up to ~2e-3 relative on 100 bars (python -m benchmarks.check_indicators),
+        # so a symbol reseeded after a gap can score slightly differently from a long-running one
+        if state is None or not self._can_continue(state, candles.timestamp[:closed_count]):
+            state = IndicatorState(self.config)
+            start = 0
+            self.states[key] = state
+            self.stats['reseeds'] += 1
+        else:
+            start = int(np.searchsorted(candles.timestamp[:closed_count], state.last_timestamp, side='right'))
+        
+        for candle in candles.data[:, start:closed_count].T.tolist():
+            state.update(candle)
+        self.stats['bars_applied'] += closed_count - start
+        
+        return state.snapshot(candles.row(-1))
+    
+    def _can_continue(self, state: IndicatorState, closed_timestamps: np.ndarray) -> bool:
+        if state.last_timestamp is None or not len(closed_timestamps):
+            return False
+        return closed_timestamps[0] <= state.last_timestamp <= closed_timestamps[-1]
+
+def _recursive_weights(length: int, alpha: float) -> np.ndarray:
+    # last value of x[t] = alpha * x[t] + (1 - alpha) * x[t-1] seeded with x[0]
+    weights = alpha * (1 - alpha) ** np.arange(length - 1, -1, -1, dtype=float)
+    weights[0] = (1 - alpha) ** (length - 1)
+    return weights
+
+def _ema_last(values: np.ndarray, window: int) -> np.ndarray:
+    length = values.shape[1]
+    if length < window:
+        return np.full(values.shape[0], np.nan)
+    return values @ _recursive_weights(length, 2 / (window + 1))
+
+def _rsi_last(closes: np.ndarray, window: int) -> np.ndarray:
+    length = closes.shape[1]
+    if length < window:
+        return np.full(closes.shape[0], np.nan)
+    
+    diff = np.zeros_like(closes)
+    diff[:, 1:] = np.diff(closes, axis=1)
+    weights = _recursive_weights(length, 1 / window)
+    avg_gain = np.clip(diff, 0, None) @ weights
+    avg_loss = np.clip(-diff, 0, None) @ weights
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, rsi)
+
+def _atr_last(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, window: int) -> np.ndarray:
+    length = closes.shape[1]
+    if length < window:
+        return np.zeros(closes.shape[0])
+    
+    true_range = highs - lows
+    prev_close = closes[:, :-1]
+    true_range[:, 1:] = np.maximum.reduce([
+        true_range[:, 1:],
+        np.abs(highs[:, 1:] - prev_close),
+        np.abs(lows[:, 1:] - prev_close)
+    ])
+    
+    alpha = 1 / window
+    seed = true_range[:, :window].mean(axis=1)
+    tail = length - window
+    if tail == 0:
+        return seed
+    weights = alpha * (1 - alpha) ** np.arange(tail - 1, -1, -1, dtype=float)
+    return seed * (1 - alpha) ** tail + true_range[:, window:] @ weights
+
+def calculate_indicators_batch(config, highs: np.ndarray, lows: np.ndarray,
+                               closes: np.ndarray, volumes: np.ndarray) -> List[Dict]:
+    ema9 = _ema_last(closes, config.EMA_FAST)
+    ema21 = _ema_last(closes, config.EMA_MEDIUM)
+    ema50 = _ema_last(closes, config.EMA_SLOW)
+    rsi = _rsi_last(closes, config.RSI_PERIOD)
+    atr = _atr_last(highs, lows, closes, config.ATR_PERIOD)
+    
+    if volumes.shape[1] >= config.VOLUME_SMA:
+        volume_sma = volumes[:, -config.VOLUME_SMA:].mean(axis=1)
+    else:
+        volume_sma = np.full(volumes.shape[0], np.nan)
+    
+    return [
+        {
+            'ema9': ema9[i],
+            'ema21': ema21[i],
+            'ema50': ema50[i],
+            'rsi': rsi[i],
+            'atr': atr[i],
+            'volume_sma': volume_sma[i],
+            'current_volume': volumes[i, -1]
+        }
+        for i in range(closes.shape[0])
+    ]
@@ -0,0 +1,46 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+def bucket_size(current_price: float, tick_size: Optional[float], atr: Optional[float],
+                bucket_ticks: int, atr_fraction: float) -> float:
+    tick = tick_size if tick_size and tick_size > 0 else current_price * 1e-5
+    bucket = tick * bucket_ticks
+    
+    if atr is not None and np.isfinite(atr) and atr > 0:
+        bucket = max(bucket, atr * atr_fraction)
+    
+    # snap to whole ticks so every bucket holds the same number of price levels
+    return max(tick, round(bucket / tick) * tick)
+
+def find_liquidity_clusters(levels, current_price: float, price_range: float,
+                            bucket: float, top_n: int) -> List[Dict]:
+    if levels is None or not len(levels):
+        return []
+    
+    book = np.asarray(levels, dtype=np.float64)
+    prices = book[:, 0]
+    volumes = book[:, 1]
+    
+    in_range = np.abs(prices - current_price) <= price_range
+    prices = prices[in_range]
+    volumes = volumes[in_range]
+    if not prices.size:
+        return []
+    
+    buckets, inverse = np.unique(np.floor(prices / bucket).astype(np.int64), return_inverse=True)
+    cluster_volume = np.bincount(inverse, weights=volumes)
+    cluster_notional = np.bincount(inverse, weights=prices * volumes)
+    
+    count = min(top_n, buckets.size)
+    top = np.argpartition(cluster_volume, -count)[-count:]
+    top = top[np.argsort(cluster_volume[top])[::-1]]
+    
+    clusters = []
+    for i in top:
+        volume = cluster_volume[i]
+        # volume-weighted price of the cluster, bucket centre for empty levels
+        price = cluster_notional[i] / volume if volume > 0 else (buckets[i] + 0.5) * bucket
+        clusters.append({'price': float(price), 'volume': float(volume)})
+    
+    return clusters
@@ -0,0 +1,53 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MarketCache:
+    def __init__(self, config, path: Optional[str] = None):
+        self.config = config
+        self.path = path or config.MARKET_CACHE_PATH
+    
+    def load(self) -> Optional[Dict]:
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable market cache {self.path}: {e}")
+            return None
+        
+        if not isinstance(cached, dict) or not cached.get('markets'):
+            logger.warning(f"Ignoring malformed market cache {self.path}")
+            return None
+        
+        age = time.time() - cached.get('saved_at', 0)
+        if not 0 <= age < self.config.MARKET_CACHE_HOURS * 3600:
+            logger.info(f"Market cache {self.path} is {age / 3600:.1f}h old, fetching markets")
+            return None
+        
+        # the liquid set only holds for the volume threshold it was filtered with
+        if cached.get('min_volume') != self.config.MIN_VOLUME_USDT:
+            cached['pairs'] = None
+        return cached
+    
+    def save(self, markets: List[Dict], pairs: List[str]):
+        data = {
+            'saved_at': time.time(),
+            'min_volume': self.config.MIN_VOLUME_USDT,
+            'markets': markets,
+            'pairs': pairs
+        }
+        
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(data, f)
+            # swapped in whole so a crash mid-write never leaves a truncated cache
+            os.replace(temp_path, self.path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to write market cache {self.path}: {e}")
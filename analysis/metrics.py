@@ -0,0 +1,175 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+STAGES = ['fetch', 'conversion', 'indicators', 'patterns', 'sr', 'scoring', 'telegram_send']
+
+class Histogram:
+    def __init__(self, buckets: List[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+    
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                # linear interpolation inside the bucket, as histogram_quantile does
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class Metrics:
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+        self.captured = None
+    
+    @staticmethod
+    def _key(labels: Dict) -> Tuple:
+        return tuple(sorted(labels.items()))
+    
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            if self.captured is not None:
+                self.captured.append(('observe', stage, seconds, None))
+                return
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+    
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        with self.lock:
+            if self.captured is not None:
+                self.captured.append(('inc', name, value, labels))
+                return
+            series = self.counters.setdefault(name, {})
+            key = self._key(labels)
+            series[key] = series.get(key, 0) + value
+    
+    def start_capture(self):
+        # worker processes buffer their measurements instead of keeping a registry of their own
+        self.captured = []
+    
+    def drain(self) -> list:
+        with self.lock:
+            captured, self.captured = self.captured, []
+        return captured
+    
+    def replay(self, captured: list):
+        for kind, name, value, labels in captured:
+            if kind == 'observe':
+                self.observe(name, value)
+            else:
+                self.inc(name, value, **labels)
+    
+    def set_gauge(self, name: str, value: float):
+        self.gauges[name] = value
+    
+    def counter(self, name: str, **labels) -> float:
+        series = self.counters.get(name, {})
+        if labels:
+            return series.get(self._key(labels), 0)
+        return sum(series.values())
+    
+    def counter_by(self, name: str, label: str) -> Dict[str, float]:
+        values = {}
+        for key, value in self.counters.get(name, {}).items():
+            label_value = dict(key).get(label)
+            values[label_value] = values.get(label_value, 0) + value
+        return values
+    
+    def stage_summary(self) -> Dict[str, Dict]:
+        summary = {}
+        for stage in STAGES + sorted(set(self.histograms) - set(STAGES)):
+            histogram = self.histograms.get(stage)
+            if histogram and histogram.count:
+                summary[stage] = {
+                    'count': histogram.count,
+                    'avg': histogram.total / histogram.count,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95)
+                }
+        return summary
+    
+    def render_prometheus(self) -> str:
+        lines = ['# TYPE scanner_stage_seconds histogram']
+        for stage, histogram in sorted(self.histograms.items()):
+            bounds = [repr(bound) for bound in histogram.buckets] + ['+Inf']
+            cumulative = 0
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'scanner_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'scanner_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+            lines.append(f'scanner_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        
+        for name, series in sorted(self.counters.items()):
+            lines.append(f'# TYPE scanner_{name} counter')
+            for key, value in sorted(series.items()):
+                labels = ','.join(f'{label}="{label_value}"' for label, label_value in key)
+                lines.append(f'scanner_{name}{{{labels}}} {value}' if labels else f'scanner_{name} {value}')
+        
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f'# TYPE scanner_{name} gauge')
+            lines.append(f'scanner_{name} {value}')
+        
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+class MetricsServer:
+    def __init__(self, config, registry: Metrics = metrics):
+        self.config = config
+        self.registry = registry
+        self.runner = None
+    
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle_metrics)
+        
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.config.METRICS_HOST, self.config.METRICS_PORT)
+        await site.start()
+        logger.info(f"Metrics available at http://{self.config.METRICS_HOST}:{self.config.METRICS_PORT}/metrics")
+    
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+    
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render_prometheus(),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
@@ -0,0 +1,51 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BULLISH_PATTERNS = ['Hammer', 'Bullish Engulfing', 'Morning Star']
+BEARISH_PATTERNS = ['Shooting Star', 'Bearish Engulfing', 'Evening Star']
+PATTERN_NAMES = ['Hammer', 'Bullish Engulfing', 'Morning Star',
+                 'Shooting Star', 'Bearish Engulfing', 'Evening Star']
+
+def detect_pattern_masks(open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                         close: np.ndarray) -> Dict[str, np.ndarray]:
+    # inputs are (..., bars): one symbol's history or a (symbols, bars) stack
+    body = np.abs(close - open_)
+    upper_shadow = high - np.maximum(open_, close)
+    lower_shadow = np.minimum(open_, close) - low
+    bullish = close > open_
+    bearish = close < open_
+    
+    masks = {name: np.zeros(close.shape, dtype=bool) for name in PATTERN_NAMES}
+    
+    masks['Hammer'] = (lower_shadow > body * 2) & (upper_shadow < body * 0.3) & bullish
+    masks['Shooting Star'] = (upper_shadow > body * 2) & (lower_shadow < body * 0.3) & bearish
+    
+    if close.shape[-1] >= 2:
+        prev_open, prev_close = open_[..., :-1], close[..., :-1]
+        cur_open, cur_close = open_[..., 1:], close[..., 1:]
+        
+        masks['Bullish Engulfing'][..., 1:] = (bearish[..., :-1] & bullish[..., 1:] &
+                                               (cur_open < prev_close) & (cur_close > prev_open))
+        masks['Bearish Engulfing'][..., 1:] = (bullish[..., :-1] & bearish[..., 1:] &
+                                               (cur_open > prev_close) & (cur_close < prev_open))
+    
+    if close.shape[-1] >= 3:
+        first_mid = (open_[..., :-2] + close[..., :-2]) / 2
+        small_middle = body[..., 1:-1] < body[..., :-2] * 0.3
+        
+        masks['Morning Star'][..., 2:] = (bearish[..., :-2] & small_middle &
+                                          bullish[..., 2:] & (close[..., 2:] > first_mid))
+        masks['Evening Star'][..., 2:] = (bullish[..., :-2] & small_middle &
+                                          bearish[..., 2:] & (close[..., 2:] < first_mid))
+    
+    # patterns are only reported once three candles are available, as before
+    for mask in masks.values():
+        mask[..., :2] = False
+    
+    return masks
+
+def latest_patterns(masks: Dict[str, np.ndarray], row: Optional[int] = None) -> List[str]:
+    if row is None:
+        return [name for name in PATTERN_NAMES if masks[name][-1]]
+    return [name for name in PATTERN_NAMES if masks[name][row, -1]]
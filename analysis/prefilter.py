@@ -0,0 +1,121 @@
+import time
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from analysis.candles import Candles
+from analysis.indicators import IndicatorEngine
+from analysis.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# volume (2), pattern, M1 confirmation and S/R cannot be judged from a ticker
+UNBOUNDED_POINTS = 5
+
+class TickerPrefilter:
+    def __init__(self, config, fetcher):
+        self.config = config
+        self.fetcher = fetcher
+        # closed 5m bars from the fetcher's candle buffers, kept apart from the analyzer
+        # so the bound works with every executor mode
+        self.engine = IndicatorEngine(config)
+        self.last_run = {}
+    
+    def enabled(self) -> bool:
+        # one side of the EMA9/EMA21 cross always scores, so below this threshold
+        # no bound could ever fall short and the tickers request would be wasted
+        return self.config.SCAN_PREFILTER and self.config.MIN_SIGNAL_SCORE > UNBOUNDED_POINTS + 1
+    
+    async def filter(self, pairs: List[str]) -> Tuple[List[str], Dict[str, Dict[str, int]]]:
+        try:
+            tickers = await self.fetcher.fetch_tickers()
+        except Exception as e:
+            logger.warning(f"Prefilter tickers request failed, scanning all pairs: {e}")
+            return pairs, {}
+        
+        now_ms = int(time.time() * 1000)
+        kept, skipped = [], {}
+        for symbol in pairs:
+            bounds = self.bounds(symbol, tickers.get(symbol), now_ms)
+            if bounds and max(bounds.values()) < self.config.MIN_SIGNAL_SCORE:
+                skipped[symbol] = bounds
+            else:
+                kept.append(symbol)
+        
+        weights = self.config.ENDPOINT_WEIGHTS
+        saved = len(skipped) * (weights['klines'] * 2 + weights['depth']) - weights['tickers']
+        self.last_run = {'skipped': len(skipped), 'requests_saved': saved}
+        metrics.inc('prefilter_skipped_total', len(skipped))
+        metrics.inc('prefilter_requests_saved_total', saved)
+        
+        return kept, skipped
+    
+    def bounds(self, symbol: str, ticker: Optional[Dict], now_ms: int) -> Optional[Dict[str, int]]:
+        if not ticker or None in (ticker.get('last'), ticker.get('low'), ticker.get('high')):
+            return None
+        
+        buffer = self.fetcher.candle_buffers.get((symbol, '5m'))
+        if not buffer or not buffer.is_full():
+            return None
+        
+        key = (symbol, '5m')
+        self.engine.update(key, Candles.from_ohlcv(buffer.to_list()))
+        state = self.engine.states[key]
+        if state.ema_slow.count < self.config.EMA_SLOW or state.rsi.count < self.config.RSI_PERIOD:
+            return None
+        
+        # the bar that was forming at the last fetch may have closed since; its close is
+        # only known to lie inside the 24h range, anything older is too uncertain
+        timeframe_ms = buffer.timeframe_ms
+        missing = (now_ms - now_ms % timeframe_ms - state.last_timestamp) // timeframe_ms - 1
+        if missing not in (0, 1):
+            return None
+        
+        price = ticker['last']
+        low = min(ticker['low'], price)
+        high = max(ticker['high'], price)
+        
+        ema9 = self._ema(state.ema_fast, price, missing)
+        ema21 = self._ema(state.ema_medium, price, missing)
+        ema50 = self._ema(state.ema_slow, price, missing)
+        
+        def possible(*constraints) -> bool:
+            return _feasible(constraints, low, high)
+        
+        def diff(a, b):
+            return a[0] - b[0], a[1] - b[1]
+        
+        rsi = state.rsi.peek(price) if not missing else None
+        long_rsi = rsi is None or self.config.RSI_LONG_MIN <= rsi <= self.config.RSI_LONG_MAX
+        short_rsi = rsi is None or self.config.RSI_SHORT_MIN <= rsi <= self.config.RSI_SHORT_MAX
+        
+        long_bound = (possible(diff(ema9, ema21)) + possible(diff((price, 0.0), ema21)) + long_rsi
+                      + 2 * possible(diff(ema9, ema21), diff(ema21, ema50)))
+        short_bound = (possible(diff(ema21, ema9)) + possible(diff(ema21, (price, 0.0))) + short_rsi
+                       + 2 * possible(diff(ema21, ema9), diff(ema50, ema21)))
+        
+        return {
+            'LONG': int(long_bound) + UNBOUNDED_POINTS,
+            'SHORT': int(short_bound) + UNBOUNDED_POINTS
+        }
+    
+    @staticmethod
+    def _ema(ema, price: float, missing: int) -> Tuple[float, float]:
+        # EMA at the forming bar as a + b * c, c being the unknown close of a missed bar
+        alpha = ema.alpha
+        if not missing:
+            return alpha * price + (1 - alpha) * ema.value, 0.0
+        return alpha * price + (1 - alpha) ** 2 * ema.value, (1 - alpha) * alpha
+
+def _feasible(constraints, low: float, high: float) -> bool:
+    # is there a close c in [low, high] with a + b * c > 0 for every (a, b); boundary
+    # cases count as feasible, which keeps the bound an upper bound
+    lower, upper = low, high
+    for a, b in constraints:
+        if b == 0:
+            if a <= 0:
+                return False
+        elif b > 0:
+            lower = max(lower, -a / b)
+        else:
+            upper = min(upper, -a / b)
+    return lower <= upper
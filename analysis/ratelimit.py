@@ -0,0 +1,64 @@
+import asyncio
+import time
+from typing import Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.stats = {
+            'requests': 0,
+            'weight': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'max_wait': 0.0,
+            'penalties': 0
+        }
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, weight: float = 1) -> float:
+        start = time.monotonic()
+        
+        # the lock keeps waiters FIFO; whoever holds it is the next to be served
+        async with self.lock:
+            self._refill()
+            needed = min(weight, self.capacity)
+            if self.tokens < needed:
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= weight
+        
+        waited = time.monotonic() - start
+        self.stats['requests'] += 1
+        self.stats['weight'] += weight
+        if waited > 0.001:
+            self.stats['waits'] += 1
+            self.stats['wait_time'] += waited
+            self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+        
+        return waited
+    
+    def set_rate(self, rate: float, capacity: float):
+        self._refill()
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = min(self.tokens, capacity)
+    
+    def penalize(self, seconds: float):
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+        self.stats['penalties'] += 1
+        logger.warning(f"Rate limit hit, pausing requests for {seconds:.1f}s")
+    
+    def snapshot(self) -> Dict:
+        return dict(self.stats)
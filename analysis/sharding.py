@@ -0,0 +1,521 @@
+import asyncio
+import copy
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+from functools import partial
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import logging
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+from analysis.fetcher import DataFetcher
+from analysis.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = 'X-Shard-Token'
+
+# a spawned worker imports pandas, ccxt and telegram before it can register
+WORKER_BOOT_SECONDS = 60
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+_dumps = partial(json.dumps, default=_encode)
+
+def _weight(worker_id: str, symbol: str) -> int:
+    digest = hashlib.blake2b(f"{worker_id}|{symbol}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+def shard_owner(symbol: str, workers: List[str]) -> str:
+    # rendezvous hashing: when a worker leaves only its own symbols move,
+    # and every other symbol stays where its candles and indicator state are
+    return max(workers, key=lambda worker_id: _weight(worker_id, symbol))
+
+def assign_shards(pairs: List[str], workers: List[str]) -> Dict[str, List[str]]:
+    shards = {}
+    for symbol in pairs:
+        shards.setdefault(shard_owner(symbol, workers), []).append(symbol)
+    return shards
+
+class ShardCoordinator:
+    def __init__(self, config, scanner_factory):
+        self.config = config
+        self.scanner_factory = scanner_factory
+        # the coordinator only needs markets and tickers; candles live in the workers
+        fetcher_config = copy.copy(config)
+        fetcher_config.CANDLE_STORE_ENABLED = False
+        self.fetcher = DataFetcher(fetcher_config)
+        self.workers = {}
+        self.processes = {}
+        self.spawned_at = {}
+        self.work = {}
+        self.work_ready = asyncio.Condition()
+        self.round = None
+        self.round_id = 0
+        self.penalty_seq = 0
+        self.penalty_until = 0.0
+        self.penalty_from = None
+        self.runner = None
+        self.monitor_task = None
+        self.last_scan_stats = {}
+        self.scan_task = None
+        self.started_at = time.time()
+        self.time_to_first_scan = None
+    
+    @property
+    def scanning(self) -> bool:
+        return self.scan_task is not None and not self.scan_task.done()
+    
+    async def start(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/heartbeat', self._handle_heartbeat)
+        app.router.add_post('/poll', self._handle_poll)
+        app.router.add_post('/results', self._handle_results)
+        
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.config.SHARD_HOST, self.config.SHARD_PORT).start()
+        logger.info(f"Shard coordinator listening on {self.config.SHARD_HOST}:{self.config.SHARD_PORT}")
+        
+        if not self.config.SHARD_TOKEN and self.config.SHARD_HOST not in ('127.0.0.1', 'localhost', '::1'):
+            logger.warning("SHARD_TOKEN is not set, any host that can reach the coordinator may join as a worker")
+        
+        for i in range(self.config.SHARD_WORKERS):
+            self._spawn(f"local-{i}")
+        self.monitor_task = asyncio.create_task(self._monitor())
+    
+    async def stop(self):
+        if self.monitor_task:
+            self.monitor_task.cancel()
+        for process in self.processes.values():
+            process.terminate()
+        if self.runner:
+            await self.runner.cleanup()
+        await self.fetcher.close()
+    
+    def _spawn(self, worker_id: str):
+        host = self.config.SHARD_HOST
+        if host in ('0.0.0.0', '::', ''):
+            host = '127.0.0.1'
+        config_values = {name: getattr(self.config, name) for name in dir(self.config) if name.isupper()}
+        config_values['SHARD_COORDINATOR_URL'] = f"http://{host}:{self.config.SHARD_PORT}"
+        # the workers already are the processes; daemonic ones may not start pools of their own
+        if config_values['ANALYSIS_EXECUTOR'] == 'process':
+            config_values['ANALYSIS_EXECUTOR'] = 'none'
+        
+        context = multiprocessing.get_context('spawn')
+        process = context.Process(
+            target=_run_local_worker, args=(self.scanner_factory, config_values, worker_id),
+            name=f"shard-{worker_id}", daemon=True
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.spawned_at[worker_id] = time.monotonic()
+        logger.info(f"Started shard worker {worker_id} (pid {process.pid})")
+    
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.config.SHARD_HEARTBEAT_SECONDS)
+            for worker_id, process in list(self.processes.items()):
+                if process.is_alive():
+                    continue
+                
+                # a dead local process is known at once, no need to wait for missed heartbeats
+                if self.workers.pop(worker_id, None) is not None:
+                    logger.warning(f"Shard worker {worker_id} exited with code {process.exitcode}, "
+                                   f"rebalancing its pairs")
+                    metrics.inc('shard_worker_losses_total')
+                
+                # a worker that keeps crashing is restarted at most once per timeout
+                if time.monotonic() - self.spawned_at[worker_id] >= self.config.SHARD_WORKER_TIMEOUT:
+                    metrics.inc('shard_worker_restarts_total')
+                    self._spawn(worker_id)
+    
+    def _live_workers(self) -> List[str]:
+        now = time.monotonic()
+        for worker_id, worker in list(self.workers.items()):
+            if now - worker['seen'] > self.config.SHARD_WORKER_TIMEOUT:
+                del self.workers[worker_id]
+                logger.warning(f"Shard worker {worker_id} missed its heartbeats, rebalancing its pairs")
+                metrics.inc('shard_worker_losses_total')
+        
+        metrics.set_gauge('shard_workers_live', len(self.workers))
+        return sorted(self.workers)
+    
+    def _touch(self, body: Dict) -> str:
+        worker_id = body['worker_id']
+        known = self.workers.get(worker_id)
+        if known is None:
+            logger.info(f"Shard worker {worker_id} joined")
+            metrics.inc('shard_worker_joins_total')
+        elif known['session'] != body['session']:
+            # restarted under the same id before missing a heartbeat; whatever it
+            # had taken from the current round died with the old process
+            logger.warning(f"Shard worker {worker_id} restarted")
+            metrics.inc('shard_worker_losses_total')
+            current = self.round
+            if current and worker_id in current['waiting'] and worker_id not in self.work:
+                current['waiting'].discard(worker_id)
+                current['event'].set()
+        
+        self.workers[worker_id] = {'seen': time.monotonic(), 'session': body['session']}
+        return worker_id
+    
+    def _limits(self, worker_id: str) -> Dict:
+        # the global request rate and scan budget are split by each worker's share of the pairs
+        if self.round and self.round['universe'] and worker_id in self.round['shards']:
+            share = len(self.round['shards'][worker_id]) / len(self.round['universe'])
+        else:
+            share = 1 / max(1, len(self.workers))
+        
+        budget = self.config.SCAN_REQUEST_BUDGET
+        penalty = self.penalty_until - time.monotonic() if worker_id != self.penalty_from else 0.0
+        return {
+            'rate': self.config.MAX_REQUESTS_PER_SECOND * share,
+            'burst': max(1.0, self.config.RATE_LIMIT_BURST * share),
+            'budget': max(1, int(budget * share)) if budget else 0,
+            'penalty': max(0.0, penalty),
+            'penalty_seq': self.penalty_seq
+        }
+    
+    async def _read(self, request: web.Request) -> Optional[Dict]:
+        token = self.config.SHARD_TOKEN
+        if token and not hmac.compare_digest(request.headers.get(TOKEN_HEADER, ''), token):
+            return None
+        return await request.json()
+    
+    async def _handle_heartbeat(self, request: web.Request) -> web.Response:
+        body = await self._read(request)
+        if body is None:
+            return web.Response(status=403)
+        
+        worker_id = self._touch(body)
+        
+        # the exchange limits by IP, so one worker's 429 pauses them all
+        if body.get('penalties'):
+            self.penalty_seq += 1
+            self.penalty_until = time.monotonic() + self.config.RATE_LIMIT_PENALTY_SECONDS
+            self.penalty_from = worker_id
+            logger.warning(f"Shard worker {worker_id} hit the rate limit, pausing all workers")
+        
+        return web.json_response(self._limits(worker_id), dumps=_dumps)
+    
+    async def _handle_poll(self, request: web.Request) -> web.Response:
+        body = await self._read(request)
+        if body is None:
+            return web.Response(status=403)
+        
+        worker_id = self._touch(body)
+        
+        # long poll, so a new round reaches idle workers without a polling delay
+        try:
+            async with self.work_ready:
+                await asyncio.wait_for(
+                    self.work_ready.wait_for(lambda: worker_id in self.work),
+                    timeout=self.config.SHARD_POLL_SECONDS
+                )
+                round_id, symbols = self.work.pop(worker_id)
+        except asyncio.TimeoutError:
+            return web.json_response({})
+        
+        return web.json_response(
+            {'round': round_id, 'symbols': symbols, 'limits': self._limits(worker_id)}, dumps=_dumps
+        )
+    
+    async def _handle_results(self, request: web.Request) -> web.Response:
+        body = await self._read(request)
+        if body is None:
+            return web.Response(status=403)
+        
+        worker_id = self._touch(body)
+        # the requests were made either way, so late shards still count in the metrics
+        metrics.replay(body.get('metrics') or [])
+        
+        current = self.round
+        if current and body['round'] == current['id'] and worker_id in current['waiting']:
+            current['results'][worker_id] = body
+            current['waiting'].discard(worker_id)
+            current['event'].set()
+        else:
+            logger.warning(f"Discarding late results of round {body['round']} from shard worker {worker_id}")
+        
+        return web.json_response({})
+    
+    async def _wait_for_workers(self) -> List[str]:
+        # local processes that are still booting get a chance to take their shard
+        deadline = time.monotonic() + WORKER_BOOT_SECONDS
+        while time.monotonic() < deadline:
+            now = time.monotonic()
+            live = self._live_workers()
+            starting = [worker_id for worker_id, process in self.processes.items()
+                        if process.is_alive() and worker_id not in live
+                        and now - self.spawned_at[worker_id] < WORKER_BOOT_SECONDS]
+            if live and not starting:
+                break
+            await asyncio.sleep(0.2)
+        return self._live_workers()
+    
+    def stream_healthy(self) -> bool:
+        return False
+    
+    async def stream(self, on_signals):
+        logger.warning("Streaming mode is not sharded, the coordinator keeps REST scans")
+    
+    def stream_latency_stats(self) -> dict:
+        return {}
+    
+    async def scan(self):
+        if self.scanning:
+            metrics.inc('scans_merged_total')
+            logger.info("Scan already in progress, waiting for its result")
+        else:
+            self.scan_task = asyncio.create_task(self._scan())
+        return await asyncio.shield(self.scan_task)
+    
+    async def _scan(self):
+        try:
+            universe = await self.fetcher.get_liquid_pairs()
+            workers = await self._wait_for_workers()
+            if not workers:
+                logger.error("No shard workers available, skipping scan")
+                return []
+            
+            start_time = time.perf_counter()
+            skipped_before = metrics.counter('orderbook_skipped_total')
+            shards = assign_shards(universe, workers)
+            self.round_id += 1
+            self.round = {
+                'id': self.round_id,
+                'universe': universe,
+                'shards': shards,
+                'waiting': set(shards),
+                'results': {},
+                'event': asyncio.Event()
+            }
+            
+            async with self.work_ready:
+                self.work = {worker_id: (self.round_id, symbols) for worker_id, symbols in shards.items()}
+                self.work_ready.notify_all()
+            
+            logger.info(f"Scanning {len(universe)} pairs on {len(shards)} shard workers")
+            
+            results = await self._collect(self.round)
+            
+            async with self.work_ready:
+                self.work = {}
+            
+            signals = self._merge_signals(universe, results)
+            scan_time = time.perf_counter() - start_time
+            missing = sorted(set(shards) - set(results))
+            
+            self.last_scan_stats = self._merge_stats(universe, results, signals, scan_time)
+            self.last_scan_stats['workers'] = len(results)
+            self.last_scan_stats['missing_shards'] = missing
+            self.last_scan_stats['orderbooks_skipped'] = int(metrics.counter('orderbook_skipped_total') - skipped_before)
+            
+            metrics.set_gauge('last_scan_seconds', scan_time)
+            metrics.set_gauge('last_scan_pairs', self.last_scan_stats['pairs'])
+            metrics.set_gauge('last_scan_universe', len(universe))
+            metrics.set_gauge('last_scan_timestamp_seconds', time.time())
+            
+            if self.time_to_first_scan is None:
+                self.time_to_first_scan = time.time() - self.started_at
+                metrics.set_gauge('time_to_first_scan_seconds', self.time_to_first_scan)
+                logger.info(f"First scan finished {self.time_to_first_scan:.1f}s after startup")
+            
+            if missing:
+                metrics.inc('shard_missing_total', len(missing))
+                logger.warning(f"No results from shard workers {', '.join(missing)}, "
+                               f"their pairs move to the remaining workers next scan")
+            
+            logger.info(f"Sharded scan processed {self.last_scan_stats['processed']}/{self.last_scan_stats['pairs']} "
+                        f"pairs on {len(results)} workers in {scan_time:.2f}s "
+                        f"({self.last_scan_stats['symbols_per_second']:.1f} symbols/s), "
+                        f"signals: {len(signals)}, {self.last_scan_stats['requests']} requests")
+            
+            return signals
+        
+        except Exception as e:
+            logger.error(f"Error in sharded scan: {e}")
+            metrics.inc('errors_total', stage='scan')
+            return []
+    
+    async def _collect(self, current: Dict) -> Dict[str, Dict]:
+        deadline = time.monotonic() + self.config.SHARD_ROUND_TIMEOUT
+        while True:
+            current['event'].clear()
+            
+            # a worker that died mid-scan is not waited for; its pairs are picked up
+            # by the survivors once the next scan hashes over the live workers
+            live = set(self._live_workers())
+            current['waiting'] &= live
+            
+            if not current['waiting'] or time.monotonic() >= deadline:
+                return current['results']
+            
+            try:
+                await asyncio.wait_for(current['event'].wait(), self.config.SHARD_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    
+    @staticmethod
+    def _merge_signals(universe: List[str], results: Dict[str, Dict]) -> List[Dict]:
+        merged = {}
+        for result in results.values():
+            for signal in result['signals']:
+                signal['timestamp'] = datetime.fromisoformat(signal['timestamp'])
+                key = (signal['symbol'], signal['direction'])
+                if key not in merged or signal['score'] > merged[key]['score']:
+                    merged[key] = signal
+        
+        # same order as a single-process scan
+        order = {symbol: i for i, symbol in enumerate(universe)}
+        return sorted(merged.values(), key=lambda signal: order.get(signal['symbol'], len(order)))
+    
+    @staticmethod
+    def _merge_stats(universe: List[str], results: Dict[str, Dict], signals: List[Dict],
+                     scan_time: float) -> Dict:
+        stats = [result['stats'] for result in results.values() if result.get('stats')]
+        pairs = sum(s.get('pairs', 0) for s in stats)
+        requests = sum(s.get('requests', 0) for s in stats)
+        rate_limit_wait = sum(s.get('rate_limit_wait', 0.0) for s in stats)
+        
+        tiers, prefilter = {}, {}
+        for s in stats:
+            for key, value in (s.get('tiers') or {}).items():
+                tiers[key] = tiers.get(key, 0) + value
+            for key, value in (s.get('prefilter') or {}).items():
+                prefilter[key] = prefilter.get(key, 0) + value
+        
+        return {
+            'universe': len(universe),
+            'pairs': pairs,
+            'processed': sum(s.get('processed', 0) for s in stats),
+            'signals': len(signals),
+            'scan_time': scan_time,
+            'symbols_per_second': pairs / scan_time if scan_time > 0 else 0.0,
+            'requests': requests,
+            'rate_limit_wait': rate_limit_wait,
+            'avg_rate_limit_wait': rate_limit_wait / requests if requests else 0.0,
+            'loop_lag_p95': max((s.get('loop_lag_p95', 0.0) for s in stats), default=0.0),
+            'loop_lag_max': max((s.get('loop_lag_max', 0.0) for s in stats), default=0.0),
+            'finished_at': datetime.now(),
+            'tiers': tiers,
+            'prefilter': prefilter
+        }
+
+class ShardWorker:
+    def __init__(self, config, scanner, worker_id: str):
+        self.config = config
+        self.scanner = scanner
+        self.worker_id = worker_id
+        self.session_id = uuid.uuid4().hex
+        self.url = config.SHARD_COORDINATOR_URL.rstrip('/')
+        self.session = None
+        self.penalties_reported = 0
+        self.penalty_seq = 0
+        self.parent = multiprocessing.parent_process()
+    
+    async def run(self):
+        # measurements are shipped with each shard result and replayed by the coordinator
+        metrics.start_capture()
+        headers = {TOKEN_HEADER: self.config.SHARD_TOKEN} if self.config.SHARD_TOKEN else None
+        self.session = aiohttp.ClientSession(
+            headers=headers, json_serialize=_dumps,
+            timeout=aiohttp.ClientTimeout(total=self.config.SHARD_POLL_SECONDS + 30)
+        )
+        await self.scanner.fetcher.load_markets()
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        logger.info(f"Shard worker {self.worker_id} polling {self.url}")
+        
+        try:
+            while self._parent_alive():
+                try:
+                    work = await self._post('/poll', {})
+                except Exception as e:
+                    logger.warning(f"Shard coordinator unreachable: {e}")
+                    await asyncio.sleep(self.config.SHARD_HEARTBEAT_SECONDS)
+                    continue
+                
+                if 'round' in work:
+                    await self._scan_shard(work)
+        finally:
+            heartbeat_task.cancel()
+            await self.session.close()
+            await self.scanner.fetcher.close()
+            self.scanner.executor.shutdown()
+    
+    def _parent_alive(self) -> bool:
+        # local workers go away with the coordinator process that started them
+        return self.parent is None or self.parent.is_alive()
+    
+    async def _post(self, path: str, payload: Dict) -> Dict:
+        payload = {'worker_id': self.worker_id, 'session': self.session_id, **payload}
+        async with self.session.post(f"{self.url}{path}", json=payload) as response:
+            response.raise_for_status()
+            return await response.json()
+    
+    async def _heartbeat_loop(self):
+        while True:
+            try:
+                penalties = self.scanner.fetcher.rate_limiter.stats['penalties']
+                limits = await self._post('/heartbeat', {
+                    'penalties': penalties - self.penalties_reported
+                })
+                self.penalties_reported = penalties
+                self._apply_limits(limits)
+            except Exception as e:
+                logger.warning(f"Shard heartbeat failed: {e}")
+            await asyncio.sleep(self.config.SHARD_HEARTBEAT_SECONDS)
+    
+    def _apply_limits(self, limits: Dict):
+        rate_limiter = self.scanner.fetcher.rate_limiter
+        rate_limiter.set_rate(limits['rate'], limits['burst'])
+        self.config.SCAN_REQUEST_BUDGET = limits['budget']
+        
+        if limits['penalty_seq'] > self.penalty_seq:
+            self.penalty_seq = limits['penalty_seq']
+            if limits['penalty'] > 0:
+                rate_limiter.penalize(limits['penalty'])
+                # not reported back, or the pause would bounce between workers
+                self.penalties_reported += 1
+    
+    async def _scan_shard(self, work: Dict):
+        self._apply_limits(work['limits'])
+        signals = await self.scanner.scan(work['symbols'])
+        
+        try:
+            await self._post('/results', {
+                'round': work['round'],
+                'signals': signals,
+                'stats': self.scanner.last_scan_stats,
+                'metrics': metrics.drain()
+            })
+        except Exception as e:
+            logger.error(f"Failed to send results of round {work['round']}: {e}")
+
+async def run_worker(config, scanner_factory, worker_id: Optional[str] = None):
+    worker_id = worker_id or config.SHARD_WORKER_ID or socket.gethostname()
+    # one SQLite file per worker; processes appending to a shared store would contend for its lock
+    root, ext = os.path.splitext(config.CANDLE_STORE_PATH)
+    config.CANDLE_STORE_PATH = f"{root}.{worker_id}{ext}"
+    await ShardWorker(config, scanner_factory(config), worker_id).run()
+
+def _run_local_worker(scanner_factory, config_values: Dict, worker_id: str):
+    config = SimpleNamespace(**config_values)
+    asyncio.run(run_worker(config, scanner_factory, worker_id))
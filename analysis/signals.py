@@ -1,6 +1,9 @@
-from typing import Dict, Optional, List
+import time
+from typing import Dict, Optional, List, Tuple
 import logging
 
+from analysis.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 class SignalGenerator:
@@ -8,28 +11,40 @@ class SignalGenerator:
         self.config = config
     
     def generate_signal(self, analysis: Dict) -> Optional[Dict]:
+        return self.evaluate(analysis)[0]
+    
+    def evaluate(self, analysis: Dict) -> Tuple[Optional[Dict], Dict[str, int]]:
+        # raw scores are returned even below the threshold so scans can be prioritised by them
+        start = time.perf_counter()
         try:
             if not analysis:
-                return None
+                return None, {}
+            
+            long_scored = self._score_long(analysis)
+            short_scored = self._score_short(analysis)
+            scores = {'LONG': long_scored[0], 'SHORT': short_scored[0]}
             
-            long_signal = self._evaluate_long(analysis)
-            short_signal = self._evaluate_short(analysis)
+            long_signal = self._evaluate_long(analysis, long_scored)
+            short_signal = self._evaluate_short(analysis, short_scored)
             
             if long_signal and long_signal['score'] >= self.config.MIN_SIGNAL_SCORE:
                 if short_signal and short_signal['score'] > long_signal['score']:
-                    return short_signal
-                return long_signal
+                    return short_signal, scores
+                return long_signal, scores
             
             if short_signal and short_signal['score'] >= self.config.MIN_SIGNAL_SCORE:
-                return short_signal
+                return short_signal, scores
             
-            return None
+            return None, scores
             
         except Exception as e:
             logger.error(f"Error generating signal: {e}")
-            return None
+            metrics.inc('errors_total', stage='scoring')
+            return None, {}
+        finally:
+            metrics.observe('scoring', time.perf_counter() - start)
     
-    def _evaluate_long(self, analysis: Dict) -> Optional[Dict]:
+    def _score_long(self, analysis: Dict) -> Tuple[int, List[str], List[str], Optional[Dict]]:
         score = 0
         details = []
         
@@ -81,10 +96,15 @@ class SignalGenerator:
             score += 2
             details.append("✓✓ Perfect EMA alignment")
         
+        return score, details, found_patterns, near_support
+    
+    def _evaluate_long(self, analysis: Dict, scored: Optional[Tuple] = None) -> Optional[Dict]:
+        score, details, found_patterns, near_support = scored or self._score_long(analysis)
+        
         if score < self.config.MIN_SIGNAL_SCORE:
             return None
         
-        strength = "СИЛЬНЫЙ" if score >= 7 else "СРЕДНИЙ"
+        strength = "СИЛЬНЫЙ" if score >= self.config.STRONG_SIGNAL_SCORE else "СРЕДНИЙ"
         
         return {
             'symbol': analysis['symbol'],
@@ -92,16 +112,16 @@ class SignalGenerator:
             'strength': strength,
             'score': score,
             'max_score': 10,
-            'price': price,
+            'price': analysis['price'],
             'details': details,
-            'indicators_5m': ind_5m,
-            'indicators_1m': ind_1m,
+            'indicators_5m': analysis['indicators_5m'],
+            'indicators_1m': analysis['indicators_1m'],
             'patterns': found_patterns,
             'sr_level': near_support,
             'timestamp': analysis['timestamp']
         }
     
-    def _evaluate_short(self, analysis: Dict) -> Optional[Dict]:
+    def _score_short(self, analysis: Dict) -> Tuple[int, List[str], List[str], Optional[Dict]]:
         score = 0
         details = []
         
@@ -153,10 +173,15 @@ class SignalGenerator:
             score += 2
             details.append("✓✓ Perfect EMA alignment")
         
+        return score, details, found_patterns, near_resistance
+    
+    def _evaluate_short(self, analysis: Dict, scored: Optional[Tuple] = None) -> Optional[Dict]:
+        score, details, found_patterns, near_resistance = scored or self._score_short(analysis)
+        
         if score < self.config.MIN_SIGNAL_SCORE:
             return None
         
-        strength = "СИЛЬНЫЙ" if score >= 7 else "СРЕДНИЙ"
+        strength = "СИЛЬНЫЙ" if score >= self.config.STRONG_SIGNAL_SCORE else "СРЕДНИЙ"
         
         return {
             'symbol': analysis['symbol'],
@@ -164,16 +189,16 @@ class SignalGenerator:
             'strength': strength,
             'score': score,
             'max_score': 10,
-            'price': price,
+            'price': analysis['price'],
             'details': details,
-            'indicators_5m': ind_5m,
-            'indicators_1m': ind_1m,
+            'indicators_5m': analysis['indicators_5m'],
+            'indicators_1m': analysis['indicators_1m'],
             'patterns': found_patterns,
             'sr_level': near_resistance,
             'timestamp': analysis['timestamp']
         }
     
-    def check_near_level(self, price: float, levels: List[Dict], atr: float) -> Optional[Dict]:
+    def _check_near_level(self, price: float, levels: List[Dict], atr: float) -> Optional[Dict]:
         if not levels:
             return None
         
@@ -0,0 +1,152 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+from analysis.candles import Candles
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    open REAL NOT NULL,
+    high REAL NOT NULL,
+    low REAL NOT NULL,
+    close REAL NOT NULL,
+    volume REAL NOT NULL,
+    PRIMARY KEY (symbol, timeframe, timestamp)
+) WITHOUT ROWID
+"""
+
+class CandleStore:
+    def __init__(self, config, path: Optional[str] = None):
+        self.config = config
+        self.path = path or config.CANDLE_STORE_PATH
+        self.pending = []
+        self.last_flush = time.monotonic()
+        # the first compaction runs one interval after startup, not on the first flush
+        self.last_compaction = time.monotonic()
+        self.stats = {'rows_written': 0, 'flushes': 0, 'rows_deleted': 0, 'compactions': 0}
+        
+        # writes run in a worker thread, one at a time under the lock
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        # auto_vacuum only takes effect before the first table is created
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+    
+    def append(self, symbol: str, timeframe: str, ohlcv: list):
+        self.pending.extend(
+            (symbol, timeframe, int(c[0]), c[1], c[2], c[3], c[4], c[5]) for c in ohlcv
+        )
+    
+    def flush_due(self) -> bool:
+        return (len(self.pending) >= self.config.CANDLE_STORE_FLUSH_ROWS or
+                time.monotonic() - self.last_flush >= self.config.CANDLE_STORE_FLUSH_SECONDS)
+    
+    def _take_pending(self) -> list:
+        self.last_flush = time.monotonic()
+        rows, self.pending = self.pending, []
+        return rows
+    
+    def flush(self):
+        self._write(self._take_pending())
+    
+    async def flush_async(self):
+        # pending rows are taken on the loop; the sqlite write and any compaction
+        # (up to thousands of rows plus a vacuum) run in a thread
+        await asyncio.to_thread(self._write, self._take_pending())
+    
+    def _write(self, rows: list):
+        with self.lock:
+            if rows:
+                try:
+                    with self.conn:
+                        # a bar stored while still forming is overwritten by its final version
+                        self.conn.executemany(
+                            "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                        )
+                    self.stats['rows_written'] += len(rows)
+                    self.stats['flushes'] += 1
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing {len(rows)} candles to store: {e}")
+            
+            if time.monotonic() - self.last_compaction >= self.config.CANDLE_STORE_COMPACT_HOURS * 3600:
+                self.compact()
+    
+    def compact(self):
+        self.last_compaction = time.monotonic()
+        now_ms = int(time.time() * 1000)
+        
+        try:
+            deleted = 0
+            with self.lock:
+                with self.conn:
+                    for timeframe, days in self.config.CANDLE_STORE_RETENTION_DAYS.items():
+                        cursor = self.conn.execute(
+                            "DELETE FROM candles WHERE timeframe = ? AND timestamp < ?",
+                            (timeframe, now_ms - days * 86_400_000)
+                        )
+                        deleted += cursor.rowcount
+                
+                self.conn.execute("PRAGMA incremental_vacuum")
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            
+            self.stats['rows_deleted'] += deleted
+            self.stats['compactions'] += 1
+            logger.info(f"Candle store compacted: {deleted} expired rows removed")
+        except sqlite3.Error as e:
+            logger.error(f"Error compacting candle store: {e}")
+    
+    def load_recent(self, timeframe: str, limit: int, since: int) -> Dict[str, List[list]]:
+        try:
+            rows = self.conn.execute(
+                """
+                SELECT symbol, timestamp, open, high, low, close, volume FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY timestamp DESC) AS rn
+                    FROM candles WHERE timeframe = ? AND timestamp >= ?
+                ) WHERE rn <= ? ORDER BY symbol, timestamp
+                """,
+                (timeframe, since, limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error loading {timeframe} candles from store: {e}")
+            return {}
+        
+        candles = {}
+        for symbol, *candle in rows:
+            candles.setdefault(symbol, []).append(candle)
+        return candles
+    
+    def symbols(self, timeframe: str) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT DISTINCT symbol FROM candles WHERE timeframe = ? ORDER BY symbol", (timeframe,)
+        ).fetchall()
+        return [row[0] for row in rows]
+    
+    def load_history(self, symbol: str, timeframe: str, start: Optional[int] = None,
+                     end: Optional[int] = None) -> Optional[Candles]:
+        rows = self.conn.execute(
+            "SELECT timestamp, open, high, low, close, volume FROM candles "
+            "WHERE symbol = ? AND timeframe = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+            (symbol, timeframe, start or 0, end or 2 ** 62)
+        ).fetchall()
+        
+        if not rows:
+            return None
+        return Candles(np.ascontiguousarray(np.array(rows, dtype=np.float64).T))
+    
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.conn.close()
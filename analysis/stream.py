@@ -0,0 +1,154 @@
+import asyncio
+import gzip
+import json
+import time
+import uuid
+from typing import Dict, List, Optional
+import logging
+
+import aiohttp
+
+from analysis.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STREAM_TIMEFRAMES = ['5m', '1m']
+
+def to_market_id(symbol: str) -> str:
+    return symbol.split(':')[0].replace('/', '-')
+
+class MarketStream:
+    def __init__(self, config, fetcher, on_candle_close):
+        self.config = config
+        self.fetcher = fetcher
+        self.on_candle_close = on_candle_close
+        self.symbols_by_id = {}
+        self.orderbooks = {}
+        self.connections = 0
+        self.last_message_time = None
+        self.is_running = False
+        self.pending_closes = {}
+        self.tasks = set()
+    
+    def healthy(self) -> bool:
+        return (self.connections > 0 and self.last_message_time is not None and
+                time.monotonic() - self.last_message_time < self.config.STREAM_STALE_SECONDS)
+    
+    def get_orderbook(self, symbol: str) -> Optional[Dict]:
+        orderbook = self.orderbooks.get(symbol)
+        if orderbook and time.monotonic() - orderbook['received_at'] < self.config.STREAM_STALE_SECONDS:
+            return orderbook
+        return None
+    
+    async def run(self, symbols: List[str]):
+        self.is_running = True
+        self.symbols_by_id = {to_market_id(symbol): symbol for symbol in symbols}
+        
+        topics = []
+        for market_id in self.symbols_by_id:
+            topics.extend(f"{market_id}@kline_{timeframe}" for timeframe in STREAM_TIMEFRAMES)
+            topics.append(f"{market_id}@depth{self.config.STREAM_DEPTH_LEVEL}@500ms")
+        
+        chunk = self.config.STREAM_MAX_SUBSCRIPTIONS
+        connections = [
+            self._run_connection(topics[i:i + chunk]) for i in range(0, len(topics), chunk)
+        ]
+        logger.info(f"Streaming {len(symbols)} pairs over {len(connections)} connection(s)")
+        
+        try:
+            await asyncio.gather(*connections)
+        finally:
+            self.is_running = False
+    
+    async def stop(self):
+        self.is_running = False
+    
+    async def _run_connection(self, topics: List[str]):
+        backoff = 1
+        
+        while self.is_running:
+            connected = False
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(self.config.STREAM_URL) as ws:
+                        for topic in topics:
+                            await ws.send_json({'id': str(uuid.uuid4()), 'reqType': 'sub', 'dataType': topic})
+                        
+                        connected = True
+                        self.connections += 1
+                        backoff = 1
+                        
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.BINARY:
+                                text = gzip.decompress(msg.data).decode()
+                            elif msg.type == aiohttp.WSMsgType.TEXT:
+                                text = msg.data
+                            else:
+                                break
+                            
+                            self.last_message_time = time.monotonic()
+                            
+                            if text == 'Ping':
+                                await ws.send_str('Pong')
+                                continue
+                            
+                            self._handle_message(json.loads(text))
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Stream connection error: {e}")
+            finally:
+                if connected:
+                    self.connections -= 1
+            
+            if self.is_running:
+                metrics.inc('retries_total', kind='stream_reconnect')
+                logger.info(f"Stream disconnected, reconnecting in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+    
+    def _handle_message(self, message: Dict):
+        data_type = message.get('dataType')
+        data = message.get('data')
+        if not data_type or data is None:
+            return
+        
+        market_id, _, channel = data_type.partition('@')
+        symbol = self.symbols_by_id.get(market_id)
+        if symbol is None:
+            return
+        
+        try:
+            if channel.startswith('kline_'):
+                self._handle_kline(symbol, channel[len('kline_'):], data)
+            elif channel.startswith('depth'):
+                self.orderbooks[symbol] = {
+                    'bids': [[float(price), float(amount)] for price, amount in data.get('bids', [])],
+                    'asks': [[float(price), float(amount)] for price, amount in data.get('asks', [])],
+                    'received_at': time.monotonic()
+                }
+        except Exception as e:
+            logger.warning(f"Error handling stream message {data_type}: {e}")
+    
+    def _handle_kline(self, symbol: str, timeframe: str, data: list):
+        received_at = time.time()
+        
+        for kline in data:
+            candle = [int(kline['T']), float(kline['o']), float(kline['h']),
+                      float(kline['l']), float(kline['c']), float(kline['v'])]
+            
+            closed = self.fetcher.apply_stream_candle(symbol, timeframe, candle)
+            if closed and timeframe == '5m':
+                # coalesce bursts (e.g. after a reconnect) into one rescore of the newest close
+                first = symbol not in self.pending_closes
+                self.pending_closes[symbol] = (candle[0], received_at)
+                if first:
+                    task = asyncio.create_task(self._dispatch_close(symbol))
+                    self.tasks.add(task)
+                    task.add_done_callback(self.tasks.discard)
+    
+    async def _dispatch_close(self, symbol: str):
+        await asyncio.sleep(0)
+        close_ts, received_at = self.pending_closes.pop(symbol)
+        await self.on_candle_close(symbol, close_ts, received_at)
@@ -6,73 +6,194 @@ from ta.volatility import AverageTrueRange
 from typing import Dict, Optional, List, Tuple
 import logging
 
+from analysis.candles import Candles
+from analysis.indicators import IndicatorEngine, IndicatorState, calculate_indicators_batch
+from analysis.levels import bucket_size, find_liquidity_clusters
+from analysis.metrics import metrics
+from analysis.patterns import detect_pattern_masks, latest_patterns
+
 logger = logging.getLogger(__name__)
 
 class TechnicalAnalyzer:
     def __init__(self, config):
         self.config = config
+        self.indicator_engine = IndicatorEngine(config)
+        self.memo = {}
+        self.memo_closed = {}
     
     def analyze(self, data: Dict) -> Optional[Dict]:
         try:
             symbol = data['symbol']
-            
-            df_5m = self._ohlcv_to_df(data['ohlcv_5m'])
-            df_1m = self._ohlcv_to_df(data['ohlcv_1m'])
-            
-            if df_5m is None or df_1m is None:
-                return None
-            
-            indicators_5m = self._calculate_indicators(df_5m)
-            indicators_1m = self._calculate_indicators(df_1m)
-            
-            patterns = self._detect_patterns(df_5m)
-            
-            sr_levels = self._find_sr_levels(data.get('orderbook'), df_5m['close'].iloc[-1])
-            
-            current_price = df_5m['close'].iloc[-1]
-            current_volume = df_5m['volume'].iloc[-1]
-            
-            analysis = {
-                'symbol': symbol,
-                'price': current_price,
-                'timestamp': df_5m.index[-1],
-                'indicators_5m': indicators_5m,
-                'indicators_1m': indicators_1m,
-                'patterns': patterns,
-                'sr_levels': sr_levels,
-                'volume': current_volume,
-                'df_5m': df_5m,
-                'df_1m': df_1m
-            }
-            
-            return analysis
+            timeframes = {}
+            
+            for timeframe in ('5m', '1m'):
+                memoized = self._memoized_indicators(symbol, timeframe, data[f'ohlcv_{timeframe}'])
+                if memoized:
+                    timeframes[timeframe] = memoized
+                    continue
+                
+                with metrics.timer('conversion'):
+                    candles = self._ohlcv_to_candles(data[f'ohlcv_{timeframe}'])
+                if candles is None:
+                    return None
+                
+                with metrics.timer('indicators'):
+                    if self.config.INDICATOR_MODE == 'incremental':
+                        indicators = self._calculate_indicators_incremental(symbol, timeframe, candles)
+                    else:
+                        indicators = self._calculate_indicators(candles)
+                timeframes[timeframe] = (candles, indicators)
+            
+            candles_5m, indicators_5m = timeframes['5m']
+            return self._build_analysis(data, candles_5m, indicators_5m, timeframes['1m'][1])
             
         except Exception as e:
             logger.error(f"Error in technical analysis for {data.get('symbol')}: {e}")
+            metrics.inc('errors_total', stage='analysis')
             return None
     
-    def _ohlcv_to_df(self, ohlcv: list) -> Optional[pd.DataFrame]:
+    def analyze_batch(self, datas: List[Dict]) -> List[Optional[Dict]]:
+        candles_5m, indicators_5m = self._batch_timeframe(datas, '5m')
+        candles_1m, indicators_1m = self._batch_timeframe(datas, '1m')
+        
+        with metrics.timer('patterns'):
+            patterns = self._detect_patterns_batch(candles_5m)
+        
+        results = []
+        for i, data in enumerate(datas):
+            try:
+                if candles_5m[i] is None or candles_1m[i] is None:
+                    results.append(None)
+                    continue
+                results.append(self._build_analysis(
+                    data, candles_5m[i], indicators_5m[i], indicators_1m[i], patterns[i]
+                ))
+            except Exception as e:
+                logger.error(f"Error in technical analysis for {data.get('symbol')}: {e}")
+                metrics.inc('errors_total', stage='analysis')
+                results.append(None)
+        
+        return results
+    
+    def _batch_timeframe(self, datas: List[Dict], timeframe: str) -> Tuple[List, List[Dict]]:
+        candles_list = [None] * len(datas)
+        indicators = [{} for _ in datas]
+        misses = []
+        
+        for i, data in enumerate(datas):
+            memoized = self._memoized_indicators(data['symbol'], timeframe, data[f'ohlcv_{timeframe}'])
+            if memoized:
+                candles_list[i], indicators[i] = memoized
+            else:
+                misses.append(i)
+        
+        # batch timings cover the whole batch, not one symbol
+        with metrics.timer('conversion'):
+            for i in misses:
+                candles_list[i] = self._ohlcv_to_candles(datas[i][f'ohlcv_{timeframe}'])
+        
+        with metrics.timer('indicators'):
+            computed = self._calculate_indicators_batch([candles_list[i] for i in misses])
+            for i, values in zip(misses, computed):
+                indicators[i] = values
+        
+        return candles_list, indicators
+    
+    def _memoized_indicators(self, symbol: str, timeframe: str, ohlcv) -> Optional[Tuple[Candles, Dict]]:
+        # while no new bar has closed, the closed-bar indicator state is reused and only
+        # the forming bar is applied; patterns and S/R need no more than the last three bars
+        if len(ohlcv) < 3:
+            return None
+        
+        key = (symbol, timeframe)
+        closed_timestamp = ohlcv[-2][0]
+        
+        if self.config.INDICATOR_MODE == 'incremental':
+            state = self.indicator_engine.states.get(key)
+        else:
+            # window-seeded modes compute a new closed bar vectorized and only seed the
+            # state (a Python loop over the window) once a later fetch shows the same close;
+            # the same window analysed again, like the lazy order book re-analysis in the
+            # same scan, is recomputed vectorized instead of seeding
+            state = self.memo.get(key)
+            if state is None or state.last_timestamp != closed_timestamp:
+                forming = tuple(float(value) for value in ohlcv[-1])
+                seen = self.memo_closed.get(key)
+                if seen is None or seen[0] != closed_timestamp or seen[1] == forming:
+                    self.memo_closed[key] = (closed_timestamp, forming)
+                    metrics.inc('analysis_memo_total', result='miss')
+                    return None
+                state = self.memo[key] = self._seed_state(ohlcv)
+        
+        if state is None or state.last_timestamp != closed_timestamp:
+            metrics.inc('analysis_memo_total', result='miss')
+            return None
+        
+        tail = self._ohlcv_to_candles(ohlcv[-3:])
+        if tail is None:
+            return None
+        
+        metrics.inc('analysis_memo_total', result='hit')
+        return tail, state.snapshot(tail.row(-1))
+    
+    def _seed_state(self, ohlcv) -> IndicatorState:
+        state = IndicatorState(self.config)
+        closed = ohlcv[:-1]
+        for candle in (closed.tolist() if isinstance(closed, np.ndarray) else closed):
+            state.update(candle)
+        return state
+    
+    def _build_analysis(self, data: Dict, candles_5m: Candles, indicators_5m: Dict,
+                        indicators_1m: Dict, patterns: Optional[List[str]] = None) -> Dict:
+        current_price = float(candles_5m.close[-1])
+        current_volume = float(candles_5m.volume[-1])
+        
+        if patterns is None:
+            with metrics.timer('patterns'):
+                patterns = self._detect_patterns(candles_5m)
+        
+        with metrics.timer('sr'):
+            sr_levels = self._find_sr_levels(
+                data.get('orderbook'), current_price, data.get('tick_size'), indicators_5m.get('atr')
+            )
+        
+        return {
+            'symbol': data['symbol'],
+            'price': current_price,
+            'timestamp': candles_5m.datetime(-1),
+            'indicators_5m': indicators_5m,
+            'indicators_1m': indicators_1m,
+            'patterns': patterns,
+            'sr_levels': sr_levels,
+            'volume': current_volume
+        }
+    
+    def _ohlcv_to_candles(self, ohlcv: list) -> Optional[Candles]:
         try:
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            return df
+            if not len(ohlcv):
+                return None
+            return Candles.from_ohlcv(ohlcv)
         except Exception as e:
-            logger.error(f"Error converting OHLCV to DataFrame: {e}")
+            logger.error(f"Error converting OHLCV to candles: {e}")
             return None
     
-    def _calculate_indicators(self, df: pd.DataFrame) -> Dict:
+    def _calculate_indicators(self, candles: Candles) -> Dict:
         try:
-            ema9 = EMAIndicator(df['close'], window=self.config.EMA_FAST).ema_indicator()
-            ema21 = EMAIndicator(df['close'], window=self.config.EMA_MEDIUM).ema_indicator()
-            ema50 = EMAIndicator(df['close'], window=self.config.EMA_SLOW).ema_indicator()
+            close = pd.Series(candles.close)
+            high = pd.Series(candles.high)
+            low = pd.Series(candles.low)
+            volume = pd.Series(candles.volume)
             
-            rsi = RSIIndicator(df['close'], window=self.config.RSI_PERIOD).rsi()
+            ema9 = EMAIndicator(close, window=self.config.EMA_FAST).ema_indicator()
+            ema21 = EMAIndicator(close, window=self.config.EMA_MEDIUM).ema_indicator()
+            ema50 = EMAIndicator(close, window=self.config.EMA_SLOW).ema_indicator()
             
-            atr = AverageTrueRange(df['high'], df['low'], df['close'], 
+            rsi = RSIIndicator(close, window=self.config.RSI_PERIOD).rsi()
+            
+            atr = AverageTrueRange(high, low, close, 
                                    window=self.config.ATR_PERIOD).average_true_range()
             
-            volume_sma = df['volume'].rolling(window=self.config.VOLUME_SMA).mean()
+            volume_sma = volume.rolling(window=self.config.VOLUME_SMA).mean()
             
             indicators = {
                 'ema9': ema9.iloc[-1],
@@ -81,7 +202,7 @@ class TechnicalAnalyzer:
                 'rsi': rsi.iloc[-1],
                 'atr': atr.iloc[-1],
                 'volume_sma': volume_sma.iloc[-1],
-                'current_volume': df['volume'].iloc[-1]
+                'current_volume': volume.iloc[-1]
             }
             
             return indicators
@@ -90,136 +211,97 @@ class TechnicalAnalyzer:
             logger.error(f"Error calculating indicators: {e}")
             return {}
     
-    def _detect_patterns(self, df: pd.DataFrame) -> List[str]:
-        patterns = []
+    def _calculate_indicators_batch(self, candles_list: List[Optional[Candles]]) -> List[Dict]:
+        results = [{} for _ in candles_list]
+        
+        # windows of different length (fresh listings) are stacked separately
+        groups = {}
+        for i, candles in enumerate(candles_list):
+            if candles is not None:
+                groups.setdefault(len(candles), []).append(i)
         
+        for length, indices in groups.items():
+            try:
+                stacked = np.stack([candles_list[i].data for i in indices])
+                batch = calculate_indicators_batch(
+                    self.config, stacked[:, 2], stacked[:, 3], stacked[:, 4], stacked[:, 5]
+                )
+                for i, indicators in zip(indices, batch):
+                    results[i] = indicators
+            except Exception as e:
+                logger.error(f"Error calculating batch indicators for {length}-bar windows: {e}")
+        
+        return results
+    
+    def _calculate_indicators_incremental(self, symbol: str, timeframe: str, candles: Candles) -> Dict:
         try:
-            if len(df) < 3:
-                return patterns
-            
-            c1 = df.iloc[-3]  
-            c2 = df.iloc[-2]  
-            c3 = df.iloc[-1]  
-            
-            if self._is_hammer(c3):
-                patterns.append('Hammer')
-            
-            if self._is_bullish_engulfing(c2, c3):
-                patterns.append('Bullish Engulfing')
-            
-            if self._is_morning_star(c1, c2, c3):
-                patterns.append('Morning Star')
-            
-            if self._is_shooting_star(c3):
-                patterns.append('Shooting Star')
-            
-            if self._is_bearish_engulfing(c2, c3):
-                patterns.append('Bearish Engulfing')
+            return self.indicator_engine.update((symbol, timeframe), candles) or {}
+        except Exception as e:
+            logger.error(f"Error updating indicators for {symbol} {timeframe}: {e}")
+            return {}
+    
+    def _detect_patterns(self, candles: Candles) -> List[str]:
+        try:
+            if len(candles) < 3:
+                return []
             
-            if self._is_evening_star(c1, c2, c3):
-                patterns.append('Evening Star')
+            # only the last bar is reported while scanning, so three candles are enough
+            masks = detect_pattern_masks(
+                candles.open[-3:], candles.high[-3:], candles.low[-3:], candles.close[-3:]
+            )
+            return latest_patterns(masks)
             
         except Exception as e:
             logger.error(f"Error detecting patterns: {e}")
-        
-        return patterns
-    
-    def _is_hammer(self, candle) -> bool:
-        body = abs(candle['close'] - candle['open'])
-        lower_shadow = min(candle['open'], candle['close']) - candle['low']
-        upper_shadow = candle['high'] - max(candle['open'], candle['close'])
-        
-        return (lower_shadow > body * 2 and 
-                upper_shadow < body * 0.3 and 
-                candle['close'] > candle['open'])
-    
-    def _is_shooting_star(self, candle) -> bool:
-        body = abs(candle['close'] - candle['open'])
-        upper_shadow = candle['high'] - max(candle['open'], candle['close'])
-        lower_shadow = min(candle['open'], candle['close']) - candle['low']
-        
-        return (upper_shadow > body * 2 and 
-                lower_shadow < body * 0.3 and 
-                candle['close'] < candle['open'])
-    
-    def _is_bullish_engulfing(self, c1, c2) -> bool:
-        return (c1['close'] < c1['open'] and  
-                c2['close'] > c2['open'] and  
-                c2['open'] < c1['close'] and  
-                c2['close'] > c1['open'])     
+            return []
     
-    def _is_bearish_engulfing(self, c1, c2) -> bool:
-        return (c1['close'] > c1['open'] and  
-                c2['close'] < c2['open'] and  
-                c2['open'] > c1['close'] and  
-                c2['close'] < c1['open'])     
-    
-    def _is_morning_star(self, c1, c2, c3) -> bool:
-        body1 = abs(c1['close'] - c1['open'])
-        body2 = abs(c2['close'] - c2['open'])
-        body3 = abs(c3['close'] - c3['open'])
-        
-        return (c1['close'] < c1['open'] and      
-                body2 < body1 * 0.3 and           
-                c3['close'] > c3['open'] and      
-                c3['close'] > (c1['open'] + c1['close']) / 2) 
-    
-    def _is_evening_star(self, c1, c2, c3) -> bool:
-        body1 = abs(c1['close'] - c1['open'])
-        body2 = abs(c2['close'] - c2['open'])
-        body3 = abs(c3['close'] - c3['open'])
-        
-        return (c1['close'] > c1['open'] and      
-                body2 < body1 * 0.3 and           
-                c3['close'] < c3['open'] and      
-                c3['close'] < (c1['open'] + c1['close']) / 2)
+    def _detect_patterns_batch(self, candles_list: List[Optional[Candles]]) -> List[List[str]]:
+        results = [[] for _ in candles_list]
+        indices = [i for i, candles in enumerate(candles_list) if candles is not None and len(candles) >= 3]
+        if not indices:
+            return results
+        
+        try:
+            tails = np.stack([candles_list[i].data[:, -3:] for i in indices])
+            masks = detect_pattern_masks(tails[:, 1], tails[:, 2], tails[:, 3], tails[:, 4])
+            for row, i in enumerate(indices):
+                results[i] = latest_patterns(masks, row)
+        except Exception as e:
+            logger.error(f"Error detecting patterns: {e}")
+        
+        return results
     
-    def _find_sr_levels(self, orderbook: Optional[Dict], current_price: float) -> Dict:
+    def _find_sr_levels(self, orderbook: Optional[Dict], current_price: float,
+                        tick_size: Optional[float] = None, atr: Optional[float] = None) -> Dict:
         sr_levels = {'support': [], 'resistance': []}
         
         if not orderbook:
             return sr_levels
         
         try:
-            threshold_pct = self.config.SR_DISTANCE_PERCENT / 100
-            price_range = current_price * threshold_pct
-            
-            bids = orderbook.get('bids', [])
-            bid_volumes = {}
-            
-            for price, volume in bids:
-                if abs(price - current_price) <= price_range:
-                    price_level = round(price, 2)
-                    bid_volumes[price_level] = bid_volumes.get(price_level, 0) + volume
-            
-            asks = orderbook.get('asks', [])
-            ask_volumes = {}
-            
-            for price, volume in asks:
-                if abs(price - current_price) <= price_range:
-                    price_level = round(price, 2)
-                    ask_volumes[price_level] = ask_volumes.get(price_level, 0) + volume
-            
-            if bid_volumes:
-                sorted_bids = sorted(bid_volumes.items(), key=lambda x: x[1], reverse=True)[:3]
-                sr_levels['support'] = [{'price': p, 'volume': v} for p, v in sorted_bids]
+            price_range = current_price * self.config.SR_DISTANCE_PERCENT / 100
+            bucket = bucket_size(current_price, tick_size, atr,
+                                 self.config.SR_BUCKET_TICKS, self.config.SR_BUCKET_ATR_FRACTION)
             
-            if ask_volumes:
-                sorted_asks = sorted(ask_volumes.items(), key=lambda x: x[1], reverse=True)[:3]
-                sr_levels['resistance'] = [{'price': p, 'volume': v} for p, v in sorted_asks]
+            sr_levels['support'] = find_liquidity_clusters(
+                orderbook.get('bids'), current_price, price_range, bucket, self.config.SR_TOP_LEVELS
+            )
+            sr_levels['resistance'] = find_liquidity_clusters(
+                orderbook.get('asks'), current_price, price_range, bucket, self.config.SR_TOP_LEVELS
+            )
             
         except Exception as e:
             logger.error(f"Error finding S/R levels: {e}")
         
         return sr_levels
     
-    def check_rsi_divergence(self, df: pd.DataFrame, rsi_series: pd.Series) -> Optional[str]:
+    def check_rsi_divergence(self, candles: Candles, rsi_series) -> Optional[str]:
         try:
-            if len(df) < 20:
+            if len(candles) < 20:
                 return None
             
-            prices = df['close'].iloc[-20:].values
-            rsi = rsi_series.iloc[-20:].values
+            prices = candles.close[-20:]
+            rsi = np.asarray(rsi_series)[-20:]
             
             if (prices[-1] < prices[-10] < prices[-20] and 
                 rsi[-1] > rsi[-10] > rsi[-20]):
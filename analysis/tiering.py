@@ -0,0 +1,85 @@
+import time
+from typing import Dict, List, Optional
+import logging
+
+from analysis.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TIERS = ('hot', 'warm', 'cold')
+
+# aligned scans start a few seconds either side of their boundary
+DUE_SLACK_SECONDS = 5
+
+class ScanPlanner:
+    def __init__(self, config):
+        self.config = config
+        self.symbols = {}
+        self.last_plan = {}
+        self.planned_at = None
+    
+    def _tier(self, best_score: Optional[int]) -> str:
+        if best_score is None:
+            return 'hot'
+        if best_score >= self.config.MIN_SIGNAL_SCORE - self.config.TIER_HOT_MARGIN:
+            return 'hot'
+        if best_score >= self.config.MIN_SIGNAL_SCORE - self.config.TIER_WARM_MARGIN:
+            return 'warm'
+        return 'cold'
+    
+    def _symbol_weight(self) -> int:
+        weights = self.config.ENDPOINT_WEIGHTS
+        return weights['klines'] * 2 + weights['depth']
+    
+    def plan(self, pairs: List[str], now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        self.planned_at = now
+        period = {
+            'warm': self.config.TIER_WARM_SECONDS,
+            'cold': self.config.TIER_COLD_SECONDS
+        }
+        
+        # symbols that dropped out of the universe are forgotten
+        self.symbols = {symbol: self.symbols[symbol] for symbol in pairs if symbol in self.symbols}
+        
+        hot, due = [], []
+        counts = dict.fromkeys(TIERS, 0)
+        for symbol in pairs:
+            state = self.symbols.get(symbol)
+            tier = self._tier(state['score'] if state else None)
+            counts[tier] += 1
+            
+            if tier == 'hot':
+                hot.append(symbol)
+                continue
+            
+            # how many of its periods the symbol has gone without a scan
+            overdue = (now - state['scanned_at'] + DUE_SLACK_SECONDS) / period[tier]
+            if overdue >= 1:
+                due.append((overdue, symbol))
+        
+        # near-threshold and unseen symbols are always scanned; due ones fill
+        # what is left of the budget, most overdue first
+        selected = hot + [symbol for _, symbol in sorted(due, reverse=True)]
+        if self.config.SCAN_REQUEST_BUDGET:
+            room = max(len(hot), self.config.SCAN_REQUEST_BUDGET // self._symbol_weight())
+            selected = selected[:room]
+        
+        self.last_plan = {
+            **counts,
+            'selected': len(selected),
+            'deferred': len(pairs) - len(selected)
+        }
+        for tier in TIERS:
+            metrics.set_gauge(f'scan_tier_{tier}_symbols', counts[tier])
+        metrics.inc('scan_deferred_total', len(pairs) - len(selected))
+        
+        return selected
+    
+    def record(self, symbol: str, scores: Dict[str, int], now: Optional[float] = None):
+        if not scores:
+            return
+        if now is None:
+            # stamped with the plan time so scan duration does not push symbols a period back
+            now = self.planned_at if self.planned_at is not None else time.time()
+        self.symbols[symbol] = {'score': max(scores.values()), 'scanned_at': now}
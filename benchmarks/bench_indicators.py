@@ -0,0 +1,69 @@
+# Usage: python -m benchmarks.bench_indicators [--bars 100] [--repeat 3]
+import argparse
+import time
+
+import numpy as np
+
+from config import Config
+from analysis.candles import Candles
+from analysis.indicators import IndicatorEngine
+from analysis.technical import TechnicalAnalyzer
+
+SYMBOL_COUNTS = [50, 200, 1000]
+
+def make_windows(symbols: int, bars: int, seed: int = 42) -> list:
+    rng = np.random.default_rng(seed)
+    windows = []
+    for _ in range(symbols):
+        close = 100 + np.cumsum(rng.normal(0, 1, bars))
+        open_ = close + rng.normal(0, 0.3, bars)
+        high = np.maximum(open_, close) + rng.random(bars)
+        low = np.minimum(open_, close) - rng.random(bars)
+        volume = rng.uniform(1e3, 1e5, bars)
+        windows.append([
+            [i * 300_000, open_[i], high[i], low[i], close[i], volume[i]]
+            for i in range(bars)
+        ])
+    return windows
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run(bars: int, repeat: int):
+    config = Config()
+    analyzer = TechnicalAnalyzer(config)
+    
+    print(f"{'symbols':>8} {'ta per-symbol':>14} {'incr. (cold)':>12} {'batch':>10} {'speedup':>8}")
+    for symbols in SYMBOL_COUNTS:
+        windows = make_windows(symbols, bars)
+        candles = [Candles.from_ohlcv(ohlcv) for ohlcv in windows]
+        
+        def per_symbol():
+            for window in candles:
+                analyzer._calculate_indicators(window)
+        
+        def incremental_cold():
+            engine = IndicatorEngine(config)
+            for i, window in enumerate(candles):
+                engine.update(i, window)
+        
+        def batch():
+            analyzer._calculate_indicators_batch(candles)
+        
+        t_ta = best_of(repeat, per_symbol)
+        t_inc = best_of(repeat, incremental_cold)
+        t_batch = best_of(repeat, batch)
+        print(f"{symbols:>8} {t_ta * 1000:>12.1f}ms {t_inc * 1000:>10.1f}ms "
+              f"{t_batch * 1000:>8.1f}ms {t_ta / t_batch:>7.1f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-symbol vs batched indicator benchmark')
+    parser.add_argument('--bars', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.bars, args.repeat)
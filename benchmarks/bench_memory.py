@@ -0,0 +1,50 @@
+# Usage: python -m benchmarks.bench_memory [--symbols 500]
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from config import Config
+from analysis.candles import Candles
+from analysis.technical import TechnicalAnalyzer
+from benchmarks.bench_indicators import make_windows
+
+def to_dataframe(ohlcv: list) -> pd.DataFrame:
+    # the per-scan representation analyze() used before Candles
+    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    return df
+
+def measure(label: str, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    retained = func()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    print(f"{label:<28} {elapsed * 1000:>9.1f}ms  retained {current / 1024:>9.1f}KB  peak {peak / 1024:>9.1f}KB")
+
+def run(symbols: int):
+    config = Config()
+    windows_5m = make_windows(symbols, config.CANDLE_LIMITS['5m'])
+    windows_1m = make_windows(symbols, config.CANDLE_LIMITS['1m'], seed=7)
+    datas = [
+        {'symbol': f"S{i}/USDT:USDT", 'ohlcv_5m': w5, 'ohlcv_1m': w1, 'orderbook': None}
+        for i, (w5, w1) in enumerate(zip(windows_5m, windows_1m))
+    ]
+    
+    print(f"{symbols} symbols, {config.CANDLE_LIMITS['5m']} x 5m + {config.CANDLE_LIMITS['1m']} x 1m bars")
+    measure('DataFrame conversion', lambda: [(to_dataframe(d['ohlcv_5m']), to_dataframe(d['ohlcv_1m'])) for d in datas])
+    measure('Candles conversion', lambda: [(Candles.from_ohlcv(d['ohlcv_5m']), Candles.from_ohlcv(d['ohlcv_1m'])) for d in datas])
+    
+    analyzer = TechnicalAnalyzer(config)
+    measure('analyze() results', lambda: [analyzer.analyze(d) for d in datas])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Candle representation allocation benchmark')
+    parser.add_argument('--symbols', type=int, default=500)
+    args = parser.parse_args()
+    run(args.symbols)
@@ -0,0 +1,229 @@
+# Usage: python -m benchmarks.bench_scan [--symbols 50 500 2000] [--repeat 3]
+#        [--latency 0.01] [--jitter 0.005] [--error-rate 0.0] [--output bench_scan.json]
+#        [--compare previous.json] [--executor none|thread|process] [--tiering]
+# Runs the scan pipeline against benchmarks.fake_exchange; no network access needed.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import logging
+
+import numpy as np
+
+from config import Config
+from analysis.signals import SignalGenerator
+from benchmarks.fake_exchange import FakeExchange
+from bot.messages import format_signal_message
+from main import Scanner
+
+SYMBOL_COUNTS = [50, 500, 2000]
+
+def summarize(wall: list, cpu: list, peak: int) -> dict:
+    return {
+        'runs': len(wall),
+        'p50': float(np.percentile(wall, 50)),
+        'p95': float(np.percentile(wall, 95)),
+        'p99': float(np.percentile(wall, 99)),
+        'mean': float(np.mean(wall)),
+        'cpu': float(np.sum(cpu)),
+        'peak_kb': peak / 1024
+    }
+
+async def measure(func, repeat: int) -> dict:
+    wall, cpu = [], []
+    for _ in range(repeat):
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        await func()
+        wall.append(time.perf_counter() - start)
+        cpu.append(time.process_time() - cpu_start)
+    
+    # one extra traced run; tracemalloc slows the code down too much to time it
+    tracemalloc.start()
+    await func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return summarize(wall, cpu, peak)
+
+def measure_calls(func, items: list, repeat: int) -> dict:
+    wall, cpu = [], []
+    for _ in range(repeat):
+        for item in items:
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            func(item)
+            wall.append(time.perf_counter() - start)
+            cpu.append(time.process_time() - cpu_start)
+    
+    tracemalloc.start()
+    for item in items:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return summarize(wall, cpu, peak)
+
+def make_scanner(config, symbols: int, args) -> Scanner:
+    scanner = Scanner(config)
+    scanner.fetcher.exchange = FakeExchange(
+        symbols, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate
+    )
+    return scanner
+
+async def measure_startup(config, symbols: int, args) -> dict:
+    # a new process up to its first finished scan, fetching market metadata or reading it from disk
+    stages = {}
+    with tempfile.TemporaryDirectory() as directory:
+        config.MARKET_CACHE_ENABLED = True
+        config.MARKET_CACHE_PATH = os.path.join(directory, 'markets.json')
+        
+        async def first_scan():
+            scanner = make_scanner(config, symbols, args)
+            await scanner.fetcher.initialize()
+            await scanner.scan()
+            scanner.executor.shutdown()
+        
+        async def first_scan_without_cache():
+            if os.path.exists(config.MARKET_CACHE_PATH):
+                os.remove(config.MARKET_CACHE_PATH)
+            await first_scan()
+        
+        stages['first_scan_no_cache'] = await measure(first_scan_without_cache, args.repeat)
+        stages['first_scan_cached'] = await measure(first_scan, args.repeat)
+        config.MARKET_CACHE_ENABLED = False
+    
+    return stages
+
+async def run_universe(symbols: int, args) -> dict:
+    config = Config()
+    config.CANDLE_STORE_ENABLED = False
+    config.MARKET_CACHE_ENABLED = False
+    config.MAX_REQUESTS_PER_SECOND = args.rate
+    config.RATE_LIMIT_BURST = args.rate
+    config.ANALYSIS_EXECUTOR = args.executor
+    # repeated scans are only comparable when every pair is scanned each time
+    config.SCAN_TIERING = args.tiering
+    
+    stages = {}
+    scanner = make_scanner(config, symbols, args)
+    fetcher = scanner.fetcher
+    
+    async def liquid_pairs():
+        fetcher.pairs_cache = None
+        await fetcher.get_liquid_pairs()
+    
+    stages['get_liquid_pairs'] = await measure(liquid_pairs, args.repeat)
+    stages.update(await measure_startup(config, symbols, args))
+    
+    # cold scan downloads full windows; every later scan only fetches the newest bars
+    cold_scanners = [make_scanner(config, symbols, args) for _ in range(args.repeat + 1)]
+    cold = iter(cold_scanners)
+    stages['scan_cold'] = await measure(lambda: next(cold).scan(), args.repeat)
+    for cold_scanner in cold_scanners:
+        cold_scanner.executor.shutdown()
+    
+    await scanner.scan()
+    stages['scan'] = await measure(scanner.scan, args.repeat)
+    
+    pairs = await fetcher.get_liquid_pairs()
+    datas = []
+    for symbol in pairs:
+        data = fetcher.cached_symbol_data(symbol, orderbook=await fetcher.fetch_orderbook(symbol))
+        if data:
+            datas.append(data)
+    
+    stages['analyze'] = measure_calls(scanner.analyzer.analyze, datas, args.repeat)
+    
+    # score 0 turns every analysis into a signal so every pair gets formatted
+    config.MIN_SIGNAL_SCORE = 0
+    generator = SignalGenerator(config)
+    signals = [generator.generate_signal(scanner.analyzer.analyze(data)) for data in datas]
+    stages['format_signal_message'] = measure_calls(
+        format_signal_message, [signal for signal in signals if signal], args.repeat
+    )
+    
+    scanner.executor.shutdown()
+    
+    return {
+        'executor': args.executor,
+        'stages': stages,
+        'scan_stats': scanner.last_scan_stats,
+        'requests': fetcher.exchange.calls,
+        'errors': fetcher.exchange.errors
+    }
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def print_results(results: dict, previous: dict = None):
+    for symbols, result in results.items():
+        scan_stats = result['scan_stats']
+        print(f"\n{symbols} symbols, {sum(result['requests'].values())} requests, {result['errors']} errors, "
+              f"{result['executor']} executor, loop lag p95 {scan_stats.get('loop_lag_p95', 0) * 1000:.1f}ms "
+              f"max {scan_stats.get('loop_lag_max', 0) * 1000:.1f}ms")
+        print(f"{'stage':<24} {'p50':>10} {'p95':>10} {'p99':>10} {'cpu':>9} {'peak':>10}")
+        
+        for stage, stats in result['stages'].items():
+            line = (f"{stage:<24} {stats['p50'] * 1000:>8.2f}ms {stats['p95'] * 1000:>8.2f}ms "
+                    f"{stats['p99'] * 1000:>8.2f}ms {stats['cpu']:>8.2f}s {stats['peak_kb']:>8.0f}KB")
+            
+            old = (previous or {}).get(symbols, {}).get('stages', {}).get(stage)
+            if old and old['p50'] > 0:
+                line += f"  p50 {(stats['p50'] / old['p50'] - 1) * 100:+.1f}%"
+            print(line)
+
+async def main(args):
+    results = {}
+    for symbols in args.symbols:
+        results[str(symbols)] = await run_universe(symbols, args)
+    
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+    print_results(results, previous)
+    
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'params': {
+            'repeat': args.repeat, 'latency': args.latency, 'jitter': args.jitter,
+            'error_rate': args.error_rate, 'rate': args.rate, 'executor': args.executor
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\nResults written to {args.output}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline scan pipeline benchmark')
+    parser.add_argument('--symbols', type=int, nargs='+', default=SYMBOL_COUNTS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.01, help='seconds per fake request')
+    parser.add_argument('--jitter', type=float, default=0.005, help='+/- seconds added to latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--rate', type=int, default=1_000_000,
+                        help='requests/s for the rate limiter (default: effectively unlimited)')
+    parser.add_argument('--output', default='bench_scan.json')
+    parser.add_argument('--compare', help='earlier JSON report to diff p50 against')
+    parser.add_argument('--executor', default=Config.ANALYSIS_EXECUTOR, choices=['none', 'thread', 'process'])
+    parser.add_argument('--tiering', action='store_true', help='let repeated scans skip symbols that are not due')
+    args = parser.parse_args()
+    
+    # main configures INFO logging on import; per-request warnings would drown the report
+    logging.getLogger().setLevel(logging.ERROR)
+    asyncio.run(main(args))
@@ -0,0 +1,117 @@
+# Usage: python -m benchmarks.bench_shards [--symbols 500] [--workers 1 2 4] [--repeat 3]
+#        [--latency 0.01] [--jitter 0.005] [--output bench_shards.json]
+# Runs sharded scans with local worker processes against benchmarks.fake_exchange.
+import argparse
+import asyncio
+import json
+import platform
+import socket
+import time
+from datetime import datetime
+import logging
+
+import numpy as np
+
+from config import Config
+from analysis.sharding import ShardCoordinator
+from benchmarks.bench_scan import git_revision
+from benchmarks.fake_exchange import FakeExchange
+from main import Scanner
+
+def fake_scanner(config) -> Scanner:
+    # runs inside every worker process, so the fake universe is rebuilt from config values
+    logging.getLogger().setLevel(logging.ERROR)
+    scanner = Scanner(config)
+    scanner.fetcher.exchange = FakeExchange(
+        config.BENCH_SYMBOLS, latency=config.BENCH_LATENCY, jitter=config.BENCH_JITTER
+    )
+    return scanner
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+async def run_workers(workers: int, args) -> dict:
+    config = Config()
+    config.CANDLE_STORE_ENABLED = False
+    config.MARKET_CACHE_ENABLED = False
+    config.MAX_REQUESTS_PER_SECOND = args.rate
+    config.RATE_LIMIT_BURST = args.rate
+    config.SCAN_TIERING = False
+    config.SHARD_WORKERS = workers
+    config.SHARD_HOST = '127.0.0.1'
+    config.SHARD_PORT = free_port()
+    config.SHARD_TOKEN = ''
+    config.BENCH_SYMBOLS = args.symbols
+    config.BENCH_LATENCY = args.latency
+    config.BENCH_JITTER = args.jitter
+    
+    coordinator = ShardCoordinator(config, fake_scanner)
+    coordinator.fetcher.exchange = FakeExchange(args.symbols, latency=args.latency, jitter=args.jitter)
+    await coordinator.start()
+    
+    try:
+        # the first scan also waits for the workers to boot and fills their candle buffers
+        start = time.perf_counter()
+        await coordinator.scan()
+        first = time.perf_counter() - start
+        
+        wall, pairs = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            await coordinator.scan()
+            wall.append(time.perf_counter() - start)
+            pairs.append(coordinator.last_scan_stats['pairs'])
+    finally:
+        await coordinator.stop()
+    
+    return {
+        'workers': workers,
+        'first_scan': first,
+        'p50': float(np.percentile(wall, 50)),
+        'max': float(np.max(wall)),
+        'symbols_per_second': float(np.sum(pairs) / np.sum(wall)),
+        'scan_stats': coordinator.last_scan_stats
+    }
+
+async def main(args):
+    results = {}
+    for workers in args.workers:
+        results[str(workers)] = await run_workers(workers, args)
+    
+    base = results[str(args.workers[0])]['symbols_per_second']
+    print(f"\n{args.symbols} symbols, {args.repeat} scans per worker count")
+    print(f"{'workers':<8} {'first':>10} {'p50':>10} {'max':>10} {'symbols/s':>10} {'speedup':>8}")
+    for workers, result in results.items():
+        print(f"{workers:<8} {result['first_scan']:>9.2f}s {result['p50']:>9.2f}s {result['max']:>9.2f}s "
+              f"{result['symbols_per_second']:>10.1f} {result['symbols_per_second'] / base:>7.2f}x")
+    
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'params': {
+            'symbols': args.symbols, 'repeat': args.repeat, 'latency': args.latency,
+            'jitter': args.jitter, 'rate': args.rate
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\nResults written to {args.output}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline sharded scan benchmark')
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.01, help='seconds per fake request')
+    parser.add_argument('--jitter', type=float, default=0.005, help='+/- seconds added to latency')
+    parser.add_argument('--rate', type=int, default=1_000_000,
+                        help='global requests/s shared by the workers (default: effectively unlimited)')
+    parser.add_argument('--output', default='bench_shards.json')
+    args = parser.parse_args()
+    
+    logging.getLogger().setLevel(logging.ERROR)
+    asyncio.run(main(args))
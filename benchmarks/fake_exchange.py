@@ -0,0 +1,133 @@
+# Deterministic stand-in for ccxt.bingx used by the offline benchmarks.
+# Serves a synthetic USDT-M universe with configurable latency, jitter and error rate.
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+import ccxt.async_support as ccxt
+import numpy as np
+
+TIMEFRAME_SECONDS = {'1m': 60, '5m': 300}
+
+def _noise(keys: np.ndarray) -> np.ndarray:
+    # splitmix64: the same (symbol, timestamp) always yields the same bar
+    z = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+class FakeExchange:
+    def __init__(self, symbols: int, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, liquid_fraction: float = 1.0, seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        self.calls = {}
+        self.errors = 0
+        
+        self.precisionMode = ccxt.DECIMAL_PLACES
+        self.markets = {}
+        self.base_prices = {}
+        self.volumes = {}
+        for i in range(symbols):
+            symbol = f"SYN{i}/USDT:USDT"
+            price = 10 ** self.rng.uniform(-3, 4)
+            digits = int(4 - np.floor(np.log10(price)))
+            tick = 10 ** -digits
+            # like ccxt 4.2 bingx, price precision is a count of decimal places
+            self.markets[symbol] = {
+                'id': f"SYN{i}-USDT", 'symbol': symbol, 'type': 'swap', 'quote': 'USDT',
+                'active': True, 'precision': {'price': digits}
+            }
+            self.base_prices[symbol] = (i, price, tick)
+            liquid = self.rng.random() < liquid_fraction
+            self.volumes[symbol] = 10 ** self.rng.uniform(8, 9.5) if liquid else 10 ** self.rng.uniform(5, 7)
+    
+    async def _call(self, endpoint: str):
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            raise ccxt.NetworkError(f"synthetic {endpoint} failure")
+    
+    def parse_timeframe(self, timeframe: str) -> int:
+        return TIMEFRAME_SECONDS[timeframe]
+    
+    async def load_markets(self, reload: bool = False) -> Dict:
+        await self._call('markets')
+        return self.markets
+    
+    async def fetch_markets(self, params=None) -> List[Dict]:
+        await self._call('markets')
+        return list(self.markets.values())
+    
+    def set_markets(self, markets, currencies=None) -> Dict:
+        values = markets.values() if isinstance(markets, dict) else markets
+        self.markets = {market['symbol']: market for market in values}
+        return self.markets
+    
+    def _ticker(self, symbol: str) -> Dict:
+        # last price and 24h range agree with the candles served for the same moment
+        step = TIMEFRAME_SECONDS['5m'] * 1000
+        current = int(time.time() * 1000) // step * step
+        bars = self._bars(symbol, '5m', np.arange(current - 287 * step, current + 1, step, dtype=np.int64))
+        return {
+            'symbol': symbol,
+            'last': bars[-1][4],
+            'high': max(bar[2] for bar in bars),
+            'low': min(bar[3] for bar in bars),
+            'quoteVolume': self.volumes[symbol]
+        }
+    
+    async def fetch_tickers(self, symbols: Optional[List[str]] = None, params=None) -> Dict[str, Dict]:
+        await self._call('tickers')
+        return {symbol: self._ticker(symbol) for symbol in (symbols or self.markets)}
+    
+    async def fetch_ticker(self, symbol: str, params=None) -> Dict:
+        await self._call('ticker')
+        return self._ticker(symbol)
+    
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                          limit: Optional[int] = None, params=None) -> List[list]:
+        await self._call('klines')
+        limit = limit or 100
+        step = TIMEFRAME_SECONDS[timeframe] * 1000
+        current = int(time.time() * 1000) // step * step
+        start = current - (limit - 1) * step if since is None else since // step * step
+        timestamps = np.arange(start, min(current, start + (limit - 1) * step) + 1, step, dtype=np.int64)
+        return self._bars(symbol, timeframe, timestamps)
+    
+    def _bars(self, symbol: str, timeframe: str, timestamps: np.ndarray) -> List[list]:
+        step = TIMEFRAME_SECONDS[timeframe] * 1000
+        index, price, _ = self.base_prices[symbol]
+        keys = (timestamps // step * 4096 + index) * 8
+        # slow drift plus per-bar noise, so indicators see trends and reversals
+        mid = price * (1 + 0.03 * np.sin(timestamps / (step * 50) + index))
+        open_ = mid * (1 + (_noise(keys) - 0.5) * 0.004)
+        close = mid * (1 + (_noise(keys + 1) - 0.5) * 0.004)
+        high = np.maximum(open_, close) * (1 + _noise(keys + 2) * 0.002)
+        low = np.minimum(open_, close) * (1 - _noise(keys + 3) * 0.002)
+        volume = 1e3 * (1 + 3 * _noise(keys + 5) ** 4)
+        
+        rows = np.column_stack([open_, high, low, close, volume]).tolist()
+        return [[timestamp, *row] for timestamp, row in zip(timestamps.tolist(), rows)]
+    
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None, params=None) -> Dict:
+        await self._call('depth')
+        limit = limit or 100
+        _, price, tick = self.base_prices[symbol]
+        steps = np.arange(1, limit + 1) * tick
+        amounts = 1 + 100 * self.np_rng.random(limit) ** 3
+        return {
+            'bids': np.column_stack([price - steps, amounts]).tolist(),
+            'asks': np.column_stack([price + steps, amounts[::-1]]).tolist()
+        }
+    
+    async def close(self):
+        pass
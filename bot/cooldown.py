@@ -0,0 +1,54 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+import logging
+
+from analysis.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CANDLE_SECONDS = 300
+
+class SignalCache:
+    def __init__(self, config):
+        self.config = config
+        self.cooldown = config.SIGNAL_COOLDOWN_SECONDS
+        self.max_size = config.SIGNAL_CACHE_SIZE
+        # entries outlive a short cooldown until their 5m candle has closed
+        self.ttl = max(self.cooldown, CANDLE_SECONDS)
+        # (symbol, direction) -> last alert, oldest first so expiry and eviction pop from the front
+        self.entries = OrderedDict()
+        self.stats = {'admitted': 0, 'suppressed': 0, 'evicted': 0}
+    
+    def admit(self, signal: Dict, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        
+        key = (signal['symbol'], signal['direction'])
+        entry = self.entries.get(key)
+        
+        # within the cooldown, and always on the same candle, only a stronger score re-alerts
+        if entry and (entry['candle'] == signal['timestamp'] or now - entry['sent_at'] < self.cooldown):
+            if signal['score'] < entry['score'] + self.config.SIGNAL_REALERT_SCORE_STEP:
+                self.stats['suppressed'] += 1
+                metrics.inc('signals_suppressed_total', direction=signal['direction'])
+                return False
+        
+        self.entries[key] = {'candle': signal['timestamp'], 'score': signal['score'], 'sent_at': now}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats['evicted'] += 1
+        
+        self.stats['admitted'] += 1
+        return True
+    
+    def _expire(self, now: float):
+        while self.entries:
+            entry = next(iter(self.entries.values()))
+            if now - entry['sent_at'] < self.ttl:
+                break
+            self.entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self.entries)
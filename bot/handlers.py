@@ -3,6 +3,9 @@ from telegram.ext import ContextTypes
 from datetime import datetime
 import logging
 
+from analysis.metrics import metrics
+from bot.subscriptions import SubscriptionIndex, notified_directions, score_threshold
+
 logger = logging.getLogger(__name__)
 
 class BotHandlers:
@@ -15,6 +18,7 @@ class BotHandlers:
             'start_time': datetime.now()
         }
         self.user_settings = {}
+        self.subscriptions = SubscriptionIndex(config)
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         welcome_message = """
@@ -29,6 +33,7 @@ class BotHandlers:
 /pause - Приостановить сканирование
 /resume - Возобновить сканирование
 /test - Тестовое сообщение
+/stop - Отписаться от сигналов
 
 <b>⚙️ Текущие настройки:</b>
 • Интервал сканирования: {interval}с
@@ -42,11 +47,27 @@ class BotHandlers:
             volume=self.config.MIN_VOLUME_USDT / 1_000_000
         )
         
+        user_id = update.effective_user.id
+        self.subscriptions.update(user_id, self.user_settings.get(user_id, {}))
+        
         await update.message.reply_text(welcome_message, parse_mode='HTML')
-        logger.info(f"User {update.effective_user.id} started the bot")
+        logger.info(f"User {user_id} started the bot, {len(self.subscriptions)} subscribers")
+    
+    async def stop_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = update.effective_user.id
+        self.subscriptions.remove(user_id)
+        
+        await update.message.reply_text(
+            "🔕 Вы отписались от сигналов.\n"
+            "Используйте /start, чтобы подписаться снова."
+        )
+        logger.info(f"User {user_id} unsubscribed, {len(self.subscriptions)} subscribers")
     
     async def scan_now_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.message.reply_text("🔍 Запускаю ручное сканирование...")
+        if self.scanner.scanning:
+            await update.message.reply_text("⏳ Сканирование уже идёт, дождусь его результата...")
+        else:
+            await update.message.reply_text("🔍 Запускаю ручное сканирование...")
         
         try:
             signals = await self.scanner.scan()
@@ -78,10 +99,17 @@ class BotHandlers:
 ⏱ <b>Время работы:</b> {hours}ч {minutes}м
 🔍 <b>Всего сканирований:</b> {self.stats['scans_total']}
 📢 <b>Отправлено сигналов:</b> {self.stats['signals_sent']}
+🔁 <b>Подавлено повторов:</b> {int(metrics.counter('signals_suppressed_total'))}
 📈 <b>Средний успех:</b> {self._calculate_success_rate():.1f}%
 
 <b>Последнее сканирование:</b>
 {self._get_last_scan_info()}
+
+<b>⏱ Этапы (p50 / p95):</b>
+{self._get_stage_info()}
+
+<b>🌐 Запросы:</b>
+{self._get_request_info()}
         """
         
         await update.message.reply_text(stats_message, parse_mode='HTML')
@@ -204,6 +232,7 @@ class BotHandlers:
                 self.user_settings[user_id] = {}
             
             self.user_settings[user_id]['min_score'] = score
+            self._sync_subscription(user_id)
             
             await update.message.reply_text(
                 f"✅ Минимальный балл установлен: {score}"
@@ -221,6 +250,7 @@ class BotHandlers:
         
         current = self.user_settings[user_id].get('notify_long', True)
         self.user_settings[user_id]['notify_long'] = not current
+        self._sync_subscription(user_id)
         
         status = "включены" if not current else "выключены"
         await update.message.reply_text(f"✅ LONG сигналы {status}")
@@ -232,6 +262,7 @@ class BotHandlers:
         
         current = self.user_settings[user_id].get('notify_short', True)
         self.user_settings[user_id]['notify_short'] = not current
+        self._sync_subscription(user_id)
         
         status = "включены" if not current else "выключены"
         await update.message.reply_text(f"✅ SHORT сигналы {status}")
@@ -243,6 +274,7 @@ class BotHandlers:
         
         current = self.user_settings[user_id].get('strong_only', False)
         self.user_settings[user_id]['strong_only'] = not current
+        self._sync_subscription(user_id)
         
         status = "включен" if not current else "выключен"
         await update.message.reply_text(
@@ -253,36 +285,62 @@ class BotHandlers:
         user_id = update.effective_user.id
         if user_id in self.user_settings:
             del self.user_settings[user_id]
+        self._sync_subscription(user_id)
         
         await update.message.reply_text(
             "✅ Настройки сброшены на значения по умолчанию"
         )
     
+    def _sync_subscription(self, user_id: int):
+        if user_id in self.subscriptions:
+            self.subscriptions.update(user_id, self.user_settings.get(user_id, {}))
+    
     def _calculate_success_rate(self) -> float:
-        return 0.0
+        # share of scanned pairs that were fetched and analysed without errors
+        scanned = metrics.counter('pairs_scanned_total')
+        if not scanned:
+            return 0.0
+        return metrics.counter('pairs_processed_total') / scanned * 100
     
     def _get_last_scan_info(self) -> str:
-        if self.stats['scans_total'] == 0:
+        last_scan = self.scanner.last_scan_stats
+        if not last_scan:
             return "Ещё не было сканирований"
-        return "Недавно"
-    
-    def should_send_signal(self, signal: dict, user_id: int) -> bool:
-        user_prefs = self.user_settings.get(user_id, {})
         
-        min_score = user_prefs.get('min_score', self.config.MIN_SIGNAL_SCORE)
-        if signal['score'] < min_score:
-            return False
-        
-        if user_prefs.get('strong_only', False) and signal['strength'] != 'СИЛЬНЫЙ':
-            return False
-        
-        if signal['direction'] == 'LONG' and not user_prefs.get('notify_long', True):
-            return False
+        ago = int((datetime.now() - last_scan['finished_at']).total_seconds())
+        return (f"🕐 {last_scan['finished_at'].strftime('%H:%M:%S')} ({ago // 60}м {ago % 60}с назад)\n"
+                f"• Пар: {last_scan['processed']}/{last_scan['pairs']} (из {last_scan.get('universe', last_scan['pairs'])})\n"
+                f"• Сигналов: {last_scan['signals']}\n"
+                f"• Время: {last_scan['scan_time']:.2f}с ({last_scan['symbols_per_second']:.1f} пар/с)")
+    
+    def _get_stage_info(self) -> str:
+        summary = metrics.stage_summary()
+        if not summary:
+            return "Нет данных"
         
-        if signal['direction'] == 'SHORT' and not user_prefs.get('notify_short', True):
-            return False
+        return "\n".join(
+            f"• {stage}: {stats['p50'] * 1000:.1f}мс / {stats['p95'] * 1000:.1f}мс ({stats['count']})"
+            for stage, stats in summary.items()
+        )
+    
+    def _get_request_info(self) -> str:
+        requests = metrics.counter_by('requests_total', 'endpoint')
+        if not requests:
+            return "Нет данных"
         
-        return True
+        lines = [f"• {endpoint}: {int(count)}" for endpoint, count in sorted(requests.items())]
+        lines.append(f"• Ошибок запросов: {int(metrics.counter('request_errors_total'))}, "
+                     f"обработки: {int(metrics.counter('errors_total'))}, "
+                     f"повторов: {int(metrics.counter('retries_total'))}")
+        lines.append(f"• Ожидание лимита: {int(metrics.counter('rate_limit_waits_total'))} раз, "
+                     f"{metrics.counter('rate_limit_wait_seconds_total'):.1f}с")
+        return "\n".join(lines)
+    
+    def should_send_signal(self, signal: dict, user_id: int) -> bool:
+        # the same rules SubscriptionIndex buckets subscribers by
+        user_prefs = self.user_settings.get(user_id, {})
+        return (signal['score'] >= score_threshold(self.config, user_prefs) and
+                signal['direction'] in notified_directions(user_prefs))
     
     def increment_stats(self, scans: int = 0, signals: int = 0):
         self.stats['scans_total'] += scans
@@ -91,9 +91,11 @@ def _generate_trade_recommendations(signal: Dict) -> str:
     
     return rec
 
-def format_scan_summary(signals: list, scan_time: float) -> str:
+def format_scan_summary(signals: list, scan_time: float, throughput: float = None) -> str:
     message = "🔍 <b>Сканирование завершено</b>\n\n"
     message += f"⏱ Время: {scan_time:.2f}с\n"
+    if throughput:
+        message += f"🚀 Скорость: {throughput:.1f} пар/с\n"
     message += f"📊 Найдено сигналов: {len(signals)}\n"
     
     if signals:
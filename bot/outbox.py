@@ -0,0 +1,147 @@
+import asyncio
+from typing import Dict, List, Tuple
+import logging
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from analysis.metrics import metrics
+from analysis.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+MERGE_SEPARATOR = "\n\n"
+
+def telegram_length(text: str) -> int:
+    # Telegram counts UTF-16 code units, so most emoji take two
+    return len(text.encode('utf-16-le')) // 2
+
+def merge_messages(messages: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[Tuple[str, int]]:
+    merged = []
+    parts = []
+    length = 0
+    
+    for message in messages:
+        size = telegram_length(message)
+        extra = size + (telegram_length(MERGE_SEPARATOR) if parts else 0)
+        if parts and length + extra > limit:
+            merged.append((MERGE_SEPARATOR.join(parts), len(parts)))
+            parts, length, extra = [], 0, size
+        parts.append(message)
+        length += extra
+    
+    if parts:
+        merged.append((MERGE_SEPARATOR.join(parts), len(parts)))
+    return merged
+
+class Outbox:
+    def __init__(self, bot, config, on_delivered=None):
+        self.bot = bot
+        self.config = config
+        self.on_delivered = on_delivered
+        self.global_limiter = TokenBucket(config.TELEGRAM_GLOBAL_RATE, config.TELEGRAM_GLOBAL_RATE)
+        self.chats = {}
+        self.stats = {'sent': 0, 'signals': 0, 'merged': 0, 'retries': 0, 'dropped': 0, 'timed_out': 0}
+    
+    def _chat(self, chat_id) -> Dict:
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            # one queue and worker per chat keeps its messages in order while
+            # other chats are delivered concurrently
+            chat = {
+                'queue': asyncio.Queue(),
+                'limiter': TokenBucket(self.config.TELEGRAM_CHAT_RATE, self.config.TELEGRAM_CHAT_BURST),
+                'task': None
+            }
+            self.chats[chat_id] = chat
+        
+        # workers exit once their queue drains, so idle subscribers cost no task
+        if chat['task'] is None:
+            chat['task'] = asyncio.create_task(self._run_chat(chat_id, chat))
+        return chat
+    
+    def send(self, chat_id, text: str, kind: str = 'admin', signals: int = 0):
+        self._chat(chat_id)['queue'].put_nowait({'text': text, 'kind': kind, 'signals': signals})
+    
+    def send_signals(self, chat_id, messages: List[str]):
+        if not self.config.TELEGRAM_MERGE_SIGNALS:
+            for message in messages:
+                self.send(chat_id, message, kind='signal', signals=1)
+            return
+        
+        for text, count in merge_messages(messages):
+            self.send(chat_id, text, kind='signal', signals=count)
+            self.stats['merged'] += count - 1
+    
+    def pending(self) -> int:
+        return sum(chat['queue'].qsize() for chat in self.chats.values())
+    
+    async def join(self):
+        await asyncio.gather(*(chat['queue'].join() for chat in self.chats.values()))
+    
+    async def stop(self):
+        for chat in self.chats.values():
+            if chat['task']:
+                chat['task'].cancel()
+        self.chats = {}
+    
+    async def _run_chat(self, chat_id, chat: Dict):
+        while not chat['queue'].empty():
+            item = chat['queue'].get_nowait()
+            try:
+                await self._deliver(chat_id, item, chat['limiter'])
+            except Exception as e:
+                logger.error(f"Error delivering message to {chat_id}: {e}")
+            finally:
+                chat['queue'].task_done()
+        chat['task'] = None
+    
+    async def _deliver(self, chat_id, item: Dict, limiter: TokenBucket):
+        for attempt in range(self.config.TELEGRAM_MAX_RETRIES + 1):
+            await limiter.acquire()
+            await self.global_limiter.acquire()
+            
+            try:
+                with metrics.timer('telegram_send'):
+                    await self.bot.send_message(chat_id=chat_id, text=item['text'], parse_mode='HTML')
+            
+            except RetryAfter as e:
+                retry_after = float(e.retry_after)
+                # flood control applies to the whole bot, so every chat backs off
+                limiter.penalize(retry_after)
+                self.global_limiter.penalize(retry_after)
+                self._count_retry('telegram_retry_after')
+                logger.warning(f"Telegram flood control for {chat_id}, retrying in {retry_after:.0f}s")
+                continue
+            
+            except (BadRequest, Forbidden) as e:
+                logger.error(f"Telegram rejected {item['kind']} message for {chat_id}: {e}")
+                break
+            
+            except TimedOut as e:
+                # the request may have reached Telegram, so a resend could post the message twice
+                self.stats['timed_out'] += 1
+                metrics.inc('errors_total', stage='telegram_timeout')
+                logger.warning(f"Telegram send to {chat_id} timed out, not retrying {item['kind']} message: {e}")
+                return
+            
+            except NetworkError as e:
+                self._count_retry('telegram_network')
+                logger.warning(f"Telegram network error for {chat_id}: {e}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+                continue
+            
+            self.stats['sent'] += 1
+            self.stats['signals'] += item['signals']
+            metrics.inc('telegram_messages_total', kind=item['kind'])
+            if item['signals'] and self.on_delivered:
+                self.on_delivered(item['signals'])
+            return
+        
+        self.stats['dropped'] += 1
+        metrics.inc('errors_total', stage='telegram_send')
+        logger.error(f"Dropped {item['kind']} message for {chat_id} after {attempt + 1} attempts")
+    
+    def _count_retry(self, kind: str):
+        self.stats['retries'] += 1
+        metrics.inc('retries_total', kind=kind)
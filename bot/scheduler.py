@@ -1,11 +1,31 @@
 import asyncio
+import math
+import time
 from datetime import datetime
 import logging
 
+from analysis.metrics import metrics
+from bot.cooldown import SignalCache
 from bot.messages import format_signal_message, format_scan_summary, format_error_message
+from bot.outbox import Outbox
 
 logger = logging.getLogger(__name__)
 
+def next_scan_time(now: float, interval: int, candle_seconds: int, settle: float) -> float:
+    # scans start a little after each candle close; shorter intervals split the
+    # candle into equal gaps no longer than the interval (120s on 5m candles
+    # scans every 100s), longer ones skip whole candles
+    if interval >= candle_seconds:
+        step = interval // candle_seconds * candle_seconds
+        return ((now - settle) // step + 1) * step + settle
+    
+    scans = math.ceil(candle_seconds / interval)
+    base = (now - settle) // candle_seconds * candle_seconds + settle
+    for k in range(1, scans + 1):
+        if base + k * candle_seconds / scans > now:
+            return base + k * candle_seconds / scans
+    return base + candle_seconds
+
 class ScanScheduler:
     def __init__(self, bot, scanner, handlers, config):
         self.bot = bot
@@ -15,15 +35,27 @@ class ScanScheduler:
         self.is_running = False
         self.is_paused = False
         self.last_scan_time = None
+        self.stream_task = None
+        self.signal_cache = SignalCache(config)
+        self.outbox = Outbox(bot, config, on_delivered=lambda count: handlers.increment_stats(signals=count))
     
     async def start(self):
         self.is_running = True
         logger.info("Scheduler started")
         
+        if self.config.STREAM_MODE:
+            self.stream_task = asyncio.create_task(self.scanner.stream(self._on_stream_signals))
+            logger.info("Streaming mode enabled, REST polling is used as fallback")
+        
+        # the first scan does not wait for a candle boundary
+        await self._perform_scan()
         await self._run_loop()
     
     async def stop(self):
         self.is_running = False
+        if self.stream_task:
+            self.stream_task.cancel()
+        await self.outbox.stop()
         logger.info("Scheduler stopped")
     
     async def pause(self):
@@ -34,18 +66,55 @@ class ScanScheduler:
         self.is_paused = False
         logger.info("Scanning resumed")
     
+    def _next_scan_time(self, now: float) -> float:
+        return next_scan_time(now, self.config.SCAN_INTERVAL_SECONDS,
+                              self.config.SCAN_ALIGN_SECONDS, self.config.SCAN_SETTLE_SECONDS)
+    
     async def _run_loop(self):
         while self.is_running:
             try:
+                scheduled = self._next_scan_time(time.time())
+                await asyncio.sleep(max(0.0, scheduled - time.time()))
+                
                 if not self.is_paused:
-                    await self._perform_scan()
+                    if self.scanner.stream_healthy():
+                        self._log_stream_latency()
+                    else:
+                        await self._perform_scan()
                 
-                await asyncio.sleep(self.config.SCAN_INTERVAL_SECONDS)
+                self._check_overrun(scheduled)
                 
             except Exception as e:
                 logger.error(f"Error in scan loop: {e}")
                 await asyncio.sleep(60)
     
+    def _check_overrun(self, scheduled: float):
+        # boundaries that passed while scanning are skipped rather than run back to back
+        now = time.time()
+        boundary = self._next_scan_time(scheduled)
+        skipped = 0
+        while boundary <= now:
+            skipped += 1
+            boundary = self._next_scan_time(boundary)
+        
+        if skipped:
+            metrics.inc('scan_overruns_total')
+            metrics.inc('scan_boundaries_skipped_total', skipped)
+            logger.warning(f"Scan ran {now - scheduled:.1f}s and overran {skipped} scheduled start(s), "
+                           f"next scan at {datetime.fromtimestamp(boundary).strftime('%H:%M:%S')}")
+    
+    async def _on_stream_signals(self, signals: list):
+        if self.is_paused:
+            return
+        await self._send_signals(signals)
+    
+    def _log_stream_latency(self):
+        stats = self.scanner.stream_latency_stats()
+        if stats:
+            logger.info(f"Stream healthy, candle close to signal latency: "
+                        f"p50 {stats['p50'] * 1000:.0f}ms, p95 {stats['p95'] * 1000:.0f}ms, "
+                        f"max {stats['max'] * 1000:.0f}ms over {stats['count']} rescores")
+    
     async def _perform_scan(self):
         start_time = datetime.now()
         logger.info("Starting scheduled scan...")
@@ -58,47 +127,50 @@ class ScanScheduler:
             
             self.handlers.increment_stats(scans=1)
             
+            signals = await self._send_signals(signals)
+            
             if signals:
-                await self._send_signals(signals)
-                
-                summary = format_scan_summary(signals, scan_time)
+                throughput = self.scanner.last_scan_stats.get('symbols_per_second')
+                summary = format_scan_summary(signals, scan_time, throughput)
                 await self._send_to_admin(summary)
             else:
-                logger.info(f"No signals found. Scan took {scan_time:.2f}s")
+                logger.info(f"No new signals. Scan took {scan_time:.2f}s "
+                            f"({self.scanner.last_scan_stats.get('symbols_per_second', 0):.1f} symbols/s)")
             
         except Exception as e:
             logger.error(f"Error during scan: {e}")
             await self._send_to_admin(format_error_message(e))
     
-    async def _send_signals(self, signals: list):
-        sent_count = 0
+    async def _send_signals(self, signals: list) -> list:
+        # repeats of an unchanged signal are dropped before any rendering or sending
+        signals = [signal for signal in signals if self.signal_cache.admit(signal)]
+        if not signals:
+            return signals
+        
+        admin_chat = self.config.TELEGRAM_CHAT_ID
+        deliveries = {admin_chat: []}
         
         for signal in signals:
             try:
                 message = format_signal_message(signal)
-                
-                await self.bot.send_message(
-                    chat_id=self.config.TELEGRAM_CHAT_ID,
-                    text=message,
-                    parse_mode='HTML'
-                )
-                
-                sent_count += 1
-                logger.info(f"Signal sent: {signal['symbol']} {signal['direction']}")
-                
-                await asyncio.sleep(0.5)
-                
             except Exception as e:
-                logger.error(f"Error sending signal: {e}")
+                logger.error(f"Error formatting signal {signal.get('symbol')}: {e}")
+                continue
+            
+            # the main chat gets everything; subscribers only what their filters let through,
+            # and every recipient shares the same rendered text
+            deliveries[admin_chat].append(message)
+            for user_id in self.handlers.subscriptions.match(signal['direction'], signal['score']):
+                if str(user_id) != str(admin_chat):
+                    deliveries.setdefault(user_id, []).append(message)
+        
+        # delivery runs in the outbox, so the next scan does not wait for Telegram
+        for chat_id, messages in deliveries.items():
+            self.outbox.send_signals(chat_id, messages)
         
-        self.handlers.increment_stats(signals=sent_count)
+        logger.info(f"Queued {len(deliveries[admin_chat])} signals for {len(deliveries) - 1} subscribers, "
+                    f"{self.outbox.pending()} messages pending")
+        return signals
     
     async def _send_to_admin(self, message: str):
-        try:
-            await self.bot.send_message(
-                chat_id=self.config.TELEGRAM_CHAT_ID,
-                text=message,
-                parse_mode='HTML'
-            )
-        except Exception as e:
-            logger.error(f"Error sending to admin: {e}")
+        self.outbox.send(self.config.TELEGRAM_CHAT_ID, message)
@@ -0,0 +1,60 @@
+from typing import Dict, Iterator, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ('LONG', 'SHORT')
+
+def score_threshold(config, prefs: Dict) -> int:
+    # a signal is СИЛЬНЫЙ from STRONG_SIGNAL_SCORE up, so strong_only is a score floor
+    threshold = prefs.get('min_score', config.MIN_SIGNAL_SCORE)
+    if prefs.get('strong_only', False):
+        threshold = max(threshold, config.STRONG_SIGNAL_SCORE)
+    return threshold
+
+def notified_directions(prefs: Dict) -> List[str]:
+    return [
+        direction for direction in DIRECTIONS
+        if prefs.get(f'notify_{direction.lower()}', True)
+    ]
+
+class SubscriptionIndex:
+    def __init__(self, config):
+        self.config = config
+        # direction -> effective threshold -> subscribers, so a signal only
+        # touches the buckets at or below its score
+        self.index = {direction: {} for direction in DIRECTIONS}
+        self.entries = {}
+    
+    def update(self, user_id: int, prefs: Dict):
+        self.remove(user_id)
+        
+        threshold = score_threshold(self.config, prefs)
+        directions = notified_directions(prefs)
+        for direction in directions:
+            self.index[direction].setdefault(threshold, set()).add(user_id)
+        self.entries[user_id] = (threshold, directions)
+    
+    def remove(self, user_id: int):
+        entry = self.entries.pop(user_id, None)
+        if entry is None:
+            return
+        
+        threshold, directions = entry
+        for direction in directions:
+            bucket = self.index[direction].get(threshold)
+            if bucket is not None:
+                bucket.discard(user_id)
+                if not bucket:
+                    del self.index[direction][threshold]
+    
+    def match(self, direction: str, score: int) -> Iterator[int]:
+        for threshold, bucket in self.index.get(direction, {}).items():
+            if threshold <= score:
+                yield from bucket
+    
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.entries
+    
+    def __len__(self) -> int:
+        return len(self.entries)
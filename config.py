@@ -6,13 +6,49 @@ load_dotenv()
 class Config:
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
     TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+    TELEGRAM_GLOBAL_RATE = 30
+    TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1.0))
+    TELEGRAM_CHAT_BURST = 3
+    TELEGRAM_MAX_RETRIES = 5
+    TELEGRAM_MERGE_SIGNALS = os.getenv('TELEGRAM_MERGE_SIGNALS', 'false').lower() == 'true'
     
     SCAN_INTERVAL_SECONDS = int(os.getenv('SCAN_INTERVAL_SECONDS', 120))
+    SCAN_ALIGN_SECONDS = 300
+    SCAN_SETTLE_SECONDS = float(os.getenv('SCAN_SETTLE_SECONDS', 3))
+    SCAN_TIERING = os.getenv('SCAN_TIERING', 'true').lower() == 'true'
+    SCAN_REQUEST_BUDGET = int(os.getenv('SCAN_REQUEST_BUDGET', 0))
+    TIER_HOT_MARGIN = 1
+    TIER_WARM_MARGIN = 3
+    TIER_WARM_SECONDS = 300
+    TIER_COLD_SECONDS = 900
+    SCAN_PREFILTER = os.getenv('SCAN_PREFILTER', 'true').lower() == 'true'
     MIN_VOLUME_USDT = float(os.getenv('MIN_VOLUME_USDT', 50000000))
     MIN_SIGNAL_SCORE = int(os.getenv('MIN_SIGNAL_SCORE', 5))
+    STRONG_SIGNAL_SCORE = 7
+    SIGNAL_COOLDOWN_SECONDS = int(os.getenv('SIGNAL_COOLDOWN_SECONDS', 900))
+    SIGNAL_REALERT_SCORE_STEP = 1
+    SIGNAL_CACHE_SIZE = 10000
     
     MAX_REQUESTS_PER_SECOND = int(os.getenv('MAX_REQUESTS_PER_SECOND', 10))
+    RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', 20))
+    RATE_LIMIT_PENALTY_SECONDS = 5
+    ENDPOINT_WEIGHTS = {
+        'klines': 1,
+        'depth': 1,
+        'tickers': 5,
+        'ticker': 1,
+        'markets': 1
+    }
     MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 5))
+    MAX_SYMBOLS_IN_FLIGHT = int(os.getenv('MAX_SYMBOLS_IN_FLIGHT', 30))
+    
+    CANDLE_LIMITS = {'5m': 100, '1m': 20}
+    
+    STREAM_MODE = os.getenv('STREAM_MODE', 'false').lower() == 'true'
+    STREAM_URL = os.getenv('STREAM_URL', 'wss://open-api-swap.bingx.com/swap-market')
+    STREAM_DEPTH_LEVEL = 100
+    STREAM_MAX_SUBSCRIPTIONS = 200
+    STREAM_STALE_SECONDS = 30
     
     EMA_FAST = 9
     EMA_MEDIUM = 21
@@ -20,6 +56,9 @@ class Config:
     RSI_PERIOD = 14
     ATR_PERIOD = 14
     VOLUME_SMA = 20
+    INDICATOR_MODE = os.getenv('INDICATOR_MODE', 'incremental')
+    ANALYSIS_EXECUTOR = os.getenv('ANALYSIS_EXECUTOR', 'none')
+    ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', os.cpu_count() or 2))
     
     RSI_LONG_MIN = 50
     RSI_LONG_MAX = 65
@@ -30,8 +69,40 @@ class Config:
     
     SR_DISTANCE_PERCENT = 2.0
     SR_CLOSE_PERCENT = 0.5
+    SR_TOP_LEVELS = 3
+    SR_BUCKET_TICKS = 10
+    SR_BUCKET_ATR_FRACTION = 0.1
+    ORDERBOOK_DEPTH = int(os.getenv('ORDERBOOK_DEPTH', 500))
+    ORDERBOOK_LAZY = os.getenv('ORDERBOOK_LAZY', 'true').lower() == 'true'
+    
+    CANDLE_STORE_ENABLED = os.getenv('CANDLE_STORE_ENABLED', 'true').lower() == 'true'
+    CANDLE_STORE_PATH = os.getenv('CANDLE_STORE_PATH', 'candles.db')
+    CANDLE_STORE_RETENTION_DAYS = {'5m': 90, '1m': 7}
+    CANDLE_STORE_FLUSH_ROWS = 5000
+    CANDLE_STORE_FLUSH_SECONDS = 30
+    CANDLE_STORE_COMPACT_HOURS = 6
+    
+    BACKTEST_HORIZON_BARS = 288
+    
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 9108))
+    
+    SHARD_MODE = os.getenv('SHARD_MODE', 'off')
+    SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', os.cpu_count() or 2))
+    SHARD_HOST = os.getenv('SHARD_HOST', '127.0.0.1')
+    SHARD_PORT = int(os.getenv('SHARD_PORT', 9109))
+    SHARD_COORDINATOR_URL = os.getenv('SHARD_COORDINATOR_URL', 'http://127.0.0.1:9109')
+    SHARD_WORKER_ID = os.getenv('SHARD_WORKER_ID', '')
+    SHARD_TOKEN = os.getenv('SHARD_TOKEN', '')
+    SHARD_HEARTBEAT_SECONDS = 2
+    SHARD_WORKER_TIMEOUT = 10
+    SHARD_POLL_SECONDS = 20
+    SHARD_ROUND_TIMEOUT = 240
     
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = 'bot.log'
     
     PAIRS_CACHE_HOURS = 1
+    MARKET_CACHE_ENABLED = os.getenv('MARKET_CACHE_ENABLED', 'true').lower() == 'true'
+    MARKET_CACHE_PATH = os.getenv('MARKET_CACHE_PATH', 'markets.json')
+    MARKET_CACHE_HOURS = 24
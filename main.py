@@ -1,11 +1,21 @@
 import asyncio
 import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
 from telegram.ext import Application, CommandHandler
 
 from config import Config
+from analysis.executor import AnalysisExecutor, LoopLagMonitor
 from analysis.fetcher import DataFetcher
+from analysis.metrics import MetricsServer, metrics
+from analysis.prefilter import TickerPrefilter
+from analysis.sharding import ShardCoordinator, run_worker
 from analysis.technical import TechnicalAnalyzer
 from analysis.signals import SignalGenerator
+from analysis.stream import MarketStream
+from analysis.tiering import ScanPlanner
 from bot.handlers import BotHandlers
 from bot.scheduler import ScanScheduler
 
@@ -26,36 +36,270 @@ class Scanner:
         self.fetcher = DataFetcher(config)
         self.analyzer = TechnicalAnalyzer(config)
         self.signal_generator = SignalGenerator(config)
+        self.executor = AnalysisExecutor(config, self.analyzer, self.signal_generator)
+        self.loop_lag = LoopLagMonitor()
+        self.planner = ScanPlanner(config)
+        self.prefilter = TickerPrefilter(config, self.fetcher)
+        self.last_scan_stats = {}
+        self.market_stream = None
+        self.stream_latencies = deque(maxlen=1000)
+        self.scan_task = None
+        self.started_at = time.time()
+        self.time_to_first_scan = None
     
-    async def scan(self):
+    @property
+    def scanning(self) -> bool:
+        return self.scan_task is not None and not self.scan_task.done()
+    
+    async def scan(self, universe: Optional[List[str]] = None):
+        # scheduled and manual scans share one in-flight scan instead of doubling exchange load
+        if self.scanning:
+            metrics.inc('scans_merged_total')
+            logger.info("Scan already in progress, waiting for its result")
+        else:
+            self.scan_task = asyncio.create_task(self._scan(universe))
+        # a cancelled caller must not cancel the scan other callers are waiting on
+        return await asyncio.shield(self.scan_task)
+    
+    async def _scan(self, universe: Optional[List[str]] = None):
         try:
-            pairs = await self.fetcher.get_liquid_pairs()
-            logger.info(f"Scanning {len(pairs)} pairs")
-            
-            signals = []
-            for symbol in pairs:
-                try:
-                    data = await self.fetcher.fetch_symbol_data(symbol)
-                    if not data:
-                        continue
-                    
-                    analysis = self.analyzer.analyze(data)
-                    if not analysis:
-                        continue
-                    
-                    signal = self.signal_generator.generate_signal(analysis)
-                    if signal:
-                        signals.append(signal)
-                        
-                except Exception as e:
-                    logger.error(f"Error processing {symbol}: {e}")
-                    continue
+            # shard workers are handed their part of the universe by the coordinator
+            if universe is None:
+                universe = await self.fetcher.get_liquid_pairs()
+            pairs = self.planner.plan(universe) if self.config.SCAN_TIERING else universe
+            
+            prefilter = {}
+            if self.prefilter.enabled():
+                pairs, skipped = await self.prefilter.filter(pairs)
+                # the bound stands in for the score, so skipped symbols drift to colder tiers
+                for symbol, bounds in skipped.items():
+                    self.planner.record(symbol, bounds)
+                prefilter = dict(self.prefilter.last_run)
+                logger.info(f"Prefilter skipped {len(skipped)} pairs below the score bound, "
+                            f"saving {prefilter['requests_saved']} requests")
+            
+            logger.info(f"Scanning {len(pairs)} of {len(universe)} pairs")
+            
+            self.loop_lag.start()
+            self.loop_lag.reset()
+            start_time = time.perf_counter()
+            limiter_before = self.fetcher.rate_limiter.snapshot()
+            skipped_before = metrics.counter('orderbook_skipped_total')
+            in_flight = asyncio.Semaphore(self.config.MAX_SYMBOLS_IN_FLIGHT)
+            
+            if self.config.INDICATOR_MODE == 'batch':
+                results = await self._scan_batch(pairs, in_flight)
+            else:
+                results = await asyncio.gather(
+                    *(self._process_symbol(symbol, in_flight) for symbol in pairs)
+                )
+            
+            signals = [signal for _, signal, _ in results if signal]
+            processed_count = sum(1 for processed, _, _ in results if processed)
+            for symbol, (_, _, scores) in zip(pairs, results):
+                self.planner.record(symbol, scores)
+            
+            scan_time = time.perf_counter() - start_time
+            throughput = len(pairs) / scan_time if scan_time > 0 else 0.0
+            limiter_after = self.fetcher.rate_limiter.snapshot()
+            requests = limiter_after['requests'] - limiter_before['requests']
+            rate_limit_wait = limiter_after['wait_time'] - limiter_before['wait_time']
+            avg_wait = rate_limit_wait / requests if requests else 0.0
+            orderbooks_skipped = int(metrics.counter('orderbook_skipped_total') - skipped_before)
+            loop_lag = self.loop_lag.snapshot()
+            
+            self.last_scan_stats = {
+                'universe': len(universe),
+                'pairs': len(pairs),
+                'processed': processed_count,
+                'signals': len(signals),
+                'scan_time': scan_time,
+                'symbols_per_second': throughput,
+                'requests': requests,
+                'rate_limit_wait': rate_limit_wait,
+                'avg_rate_limit_wait': avg_wait,
+                'loop_lag_p95': loop_lag['p95'],
+                'loop_lag_max': loop_lag['max'],
+                'finished_at': datetime.now(),
+                'tiers': dict(self.planner.last_plan),
+                'prefilter': prefilter,
+                'orderbooks_skipped': orderbooks_skipped
+            }
+            
+            metrics.inc('scans_total')
+            metrics.inc('pairs_scanned_total', len(pairs))
+            metrics.inc('pairs_processed_total', processed_count)
+            for signal in signals:
+                metrics.inc('signals_total', direction=signal['direction'])
+            metrics.set_gauge('last_scan_seconds', scan_time)
+            metrics.set_gauge('last_scan_pairs', len(pairs))
+            metrics.set_gauge('last_scan_universe', len(universe))
+            metrics.set_gauge('last_scan_timestamp_seconds', time.time())
+            
+            if self.time_to_first_scan is None:
+                self.time_to_first_scan = time.time() - self.started_at
+                metrics.set_gauge('time_to_first_scan_seconds', self.time_to_first_scan)
+                logger.info(f"First scan finished {self.time_to_first_scan:.1f}s after startup")
+            
+            logger.info(f"Scan processed {processed_count}/{len(pairs)} pairs in {scan_time:.2f}s "
+                        f"({throughput:.1f} symbols/s), signals: {len(signals)}, "
+                        f"{requests} requests ({orderbooks_skipped} order books skipped), "
+                        f"avg rate limit wait: {avg_wait * 1000:.0f}ms, "
+                        f"loop lag p95 {loop_lag['p95'] * 1000:.0f}ms / max {loop_lag['max'] * 1000:.0f}ms "
+                        f"({self.executor.mode} executor)")
+            
+            if self.fetcher.store:
+                self.fetcher.flush_store()
             
             return signals
             
         except Exception as e:
             logger.error(f"Error in scan: {e}")
+            metrics.inc('errors_total', stage='scan')
             return []
+    
+    async def _scan_batch(self, pairs, in_flight: asyncio.Semaphore):
+        async def fetch(symbol):
+            async with in_flight:
+                return await self.fetcher.fetch_symbol_data(symbol, with_orderbook=not self.config.ORDERBOOK_LAZY)
+        
+        fetched = await asyncio.gather(*(fetch(symbol) for symbol in pairs), return_exceptions=True)
+        indices = [i for i, data in enumerate(fetched) if data and not isinstance(data, Exception)]
+        
+        # results stay aligned with pairs so failed fetches keep their place
+        results = [(False, None, {})] * len(pairs)
+        analysed = await self.executor.analyze_batch([fetched[i] for i in indices])
+        for i, result in zip(indices, analysed):
+            results[i] = result
+        
+        if self.config.ORDERBOOK_LAZY:
+            await self._complete_batch_with_orderbooks(fetched, indices, results, in_flight)
+        return results
+    
+    async def _complete_batch_with_orderbooks(self, fetched, indices, results, in_flight: asyncio.Semaphore):
+        pending = [i for i in indices if self._needs_orderbook(results[i][2])]
+        metrics.inc('orderbook_skipped_total', len(indices) - len(pending))
+        
+        async def fetch(i):
+            async with in_flight:
+                fetched[i]['orderbook'] = await self.fetcher.fetch_orderbook(fetched[i]['symbol'])
+        
+        await asyncio.gather(*(fetch(i) for i in pending))
+        pending = [i for i in pending if fetched[i]['orderbook']]
+        rescored = await self.executor.analyze_batch([fetched[i] for i in pending])
+        for i, result in zip(pending, rescored):
+            results[i] = result
+    
+    async def _process_symbol(self, symbol: str, in_flight: asyncio.Semaphore):
+        async with in_flight:
+            try:
+                lazy = self.config.ORDERBOOK_LAZY
+                data = await self.fetcher.fetch_symbol_data(symbol, with_orderbook=not lazy)
+                if not data:
+                    return False, None, {}
+                
+                # the slot is held while analysing so in-flight data stays bounded
+                result = await self.executor.analyze(data)
+                if lazy:
+                    result = await self._complete_with_orderbook(data, result)
+                return result
+                
+            except Exception as e:
+                logger.error(f"Error processing {symbol}: {e}")
+                metrics.inc('errors_total', stage='process_symbol')
+                return False, None, {}
+    
+    def _needs_orderbook(self, scores: dict) -> bool:
+        # S/R is worth one point, so the depth only matters once a direction is within a point
+        # of the threshold; above it the point still decides score, strength and direction
+        return bool(scores) and max(scores.values()) >= self.config.MIN_SIGNAL_SCORE - 1
+    
+    async def _complete_with_orderbook(self, data: dict, result):
+        if not self._needs_orderbook(result[2]):
+            metrics.inc('orderbook_skipped_total')
+            return result
+        
+        data['orderbook'] = await self.fetcher.fetch_orderbook(data['symbol'])
+        if not data['orderbook']:
+            return result
+        return await self.executor.analyze(data)
+
+    def stream_healthy(self) -> bool:
+        return self.market_stream is not None and self.market_stream.healthy()
+    
+    async def stream(self, on_signals):
+        while True:
+            pairs = await self.fetcher.get_liquid_pairs()
+            if not pairs:
+                await asyncio.sleep(60)
+                continue
+            
+            self.market_stream = MarketStream(
+                self.config, self.fetcher,
+                lambda symbol, close_ts, received_at: self._on_candle_close(
+                    symbol, close_ts, received_at, on_signals
+                )
+            )
+            
+            # resubscribe whenever the liquid universe is refreshed
+            try:
+                await asyncio.wait_for(
+                    self.market_stream.run(pairs),
+                    timeout=self.config.PAIRS_CACHE_HOURS * 3600
+                )
+            except asyncio.TimeoutError:
+                logger.info("Refreshing stream subscriptions")
+            finally:
+                await self.market_stream.stop()
+    
+    async def _on_candle_close(self, symbol: str, close_ts: int, received_at: float, on_signals):
+        try:
+            orderbook = self.market_stream.get_orderbook(symbol)
+            data = self.fetcher.cached_symbol_data(symbol, before=close_ts, orderbook=orderbook)
+            lazy = self.config.ORDERBOOK_LAZY
+            if data is None:
+                metrics.inc('retries_total', kind='rest_fallback')
+                data = await self.fetcher.fetch_symbol_data(symbol, with_orderbook=not lazy)
+            elif orderbook is None and not lazy:
+                data['orderbook'] = await self.fetcher.fetch_orderbook(symbol)
+            
+            if not data:
+                return
+            
+            result = await self.executor.analyze(data)
+            if lazy and data.get('orderbook') is None:
+                result = await self._complete_with_orderbook(data, result)
+            _, signal, _ = result
+            
+            # measure from the candle boundary, or from receipt if the feed clock is off
+            close_time = close_ts / 1000
+            if not 0 <= received_at - close_time < 300:
+                close_time = received_at
+            latency = time.time() - close_time
+            self.stream_latencies.append(latency)
+            metrics.observe('stream_close_to_signal', latency)
+            
+            logger.debug(f"Rescored {symbol} {latency * 1000:.0f}ms after candle close")
+            
+            if signal:
+                logger.info(f"Stream signal {symbol} {signal['direction']} "
+                            f"{latency * 1000:.0f}ms after candle close")
+                await on_signals([signal])
+                
+        except Exception as e:
+            logger.error(f"Error rescoring {symbol} on candle close: {e}")
+    
+    def stream_latency_stats(self) -> dict:
+        if not self.stream_latencies:
+            return {}
+        
+        latencies = sorted(self.stream_latencies)
+        return {
+            'count': len(latencies),
+            'p50': latencies[len(latencies) // 2],
+            'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'max': latencies[-1]
+        }
 
 async def main():
     logger.info("=" * 50)
@@ -65,7 +309,17 @@ async def main():
     config = Config()
     logger.info(f"Configuration loaded: {config.SCAN_INTERVAL_SECONDS}s interval")
     
-    scanner = Scanner(config)
+    if config.SHARD_MODE == 'worker':
+        logger.info(f"Running as shard worker of {config.SHARD_COORDINATOR_URL}")
+        await run_worker(config, Scanner)
+        return
+    
+    if config.SHARD_MODE == 'coordinator':
+        scanner = ShardCoordinator(config, Scanner)
+        await scanner.start()
+    else:
+        scanner = Scanner(config)
+    await scanner.fetcher.initialize()
     
     logger.info("Initializing Telegram bot...")
     application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
@@ -85,11 +339,18 @@ async def main():
     application.add_handler(CommandHandler("toggle_short", handlers.toggle_short_command))
     application.add_handler(CommandHandler("strong_only", handlers.strong_only_command))
     application.add_handler(CommandHandler("reset", handlers.reset_command))
+    application.add_handler(CommandHandler("stop", handlers.stop_command))
     
     logger.info("Commands registered")
     
     scheduler = ScanScheduler(application.bot, scanner, handlers, config)
     
+    if config.METRICS_PORT:
+        try:
+            await MetricsServer(config).start()
+        except OSError as e:
+            logger.error(f"Failed to start metrics server: {e}")
+    
     try:
         await application.bot.send_message(
             chat_id=config.TELEGRAM_CHAT_ID,
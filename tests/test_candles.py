@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from config import Config
+from analysis.candles import CandleBuffer
+from analysis.fetcher import DataFetcher
+from benchmarks.fake_exchange import FakeExchange
+
+STEP = 300_000
+START = 1_700_000_000_000 // STEP * STEP
+
+def bar(timestamp: int, close: float = 1.0) -> list:
+    return [timestamp, close, close, close, close, 1.0]
+
+def window(last_open: int, count: int) -> list:
+    return [bar(last_open - i * STEP) for i in range(count - 1, -1, -1)]
+
+def test_merge_overwrites_forming_bar_and_appends():
+    buffer = CandleBuffer(STEP, 5)
+    buffer.replace(window(START, 5))
+    
+    assert buffer.merge([bar(START, 2.0), bar(START + STEP, 3.0)])
+    assert buffer.last_timestamp == START + STEP
+    assert buffer.candles[-2] == bar(START, 2.0)
+    assert len(buffer.candles) == 5
+
+def test_merge_rejects_gap():
+    buffer = CandleBuffer(STEP, 5)
+    buffer.replace(window(START, 5))
+    assert not buffer.merge([bar(START + 2 * STEP)])
+
+def test_needs_full_refetch():
+    buffer = CandleBuffer(STEP, 5)
+    assert buffer.needs_full_refetch(START)
+    
+    buffer.replace(window(START, 5))
+    assert not buffer.needs_full_refetch(START + 10)
+    assert not buffer.needs_full_refetch(START + 4 * STEP)
+    # the whole window has rolled over, or the clock went backwards
+    assert buffer.needs_full_refetch(START + 5 * STEP)
+    assert buffer.needs_full_refetch(START - STEP)
+
+def test_apply_restarts_after_missed_bars():
+    buffer = CandleBuffer(STEP, 5)
+    buffer.replace(window(START, 5))
+    
+    assert buffer.apply(bar(START + STEP))
+    assert not buffer.apply(bar(START + STEP, 2.0))
+    assert buffer.candles[-1] == bar(START + STEP, 2.0)
+    
+    assert not buffer.apply(bar(START + 4 * STEP))
+    assert buffer.to_list() == [bar(START + 4 * STEP)]
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {'ms': START + 1_000}
+    monkeypatch.setattr(time, 'time', lambda: now['ms'] / 1000)
+    return now
+
+def test_fetch_candles_full_then_incremental_then_refetch(clock):
+    config = Config()
+    config.CANDLE_STORE_ENABLED = False
+    config.MARKET_CACHE_ENABLED = False
+    fetcher = DataFetcher(config)
+    fetcher.exchange = FakeExchange(1)
+    symbol = next(iter(fetcher.exchange.markets))
+    
+    async def fetch():
+        return await fetcher.fetch_candles(symbol, '5m', 100)
+    
+    first = asyncio.run(fetch())
+    assert fetcher.cache_stats['full'] == 1
+    assert first[-1][0] == START
+    
+    clock['ms'] += 3 * STEP
+    second = asyncio.run(fetch())
+    assert fetcher.cache_stats['incremental'] == 1
+    assert fetcher.cache_stats['bars_fetched'] == 100 + 4
+    assert [c[0] for c in second] == [START + (i - 96) * STEP for i in range(100)]
+    # the incremental window is the same as a fresh full fetch
+    assert second == asyncio.run(FakeExchange(1).fetch_ohlcv(symbol, '5m', limit=100))
+    
+    clock['ms'] += 100 * STEP
+    asyncio.run(fetch())
+    assert fetcher.cache_stats['full'] == 2
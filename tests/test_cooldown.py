@@ -0,0 +1,54 @@
+import pytest
+
+from config import Config
+from bot.cooldown import SignalCache
+
+def signal(score: int, candle: int = 0, symbol: str = 'BTC/USDT:USDT', direction: str = 'LONG') -> dict:
+    return {'symbol': symbol, 'direction': direction, 'score': score, 'timestamp': candle}
+
+@pytest.fixture
+def cache():
+    config = Config()
+    config.SIGNAL_COOLDOWN_SECONDS = 900
+    config.SIGNAL_REALERT_SCORE_STEP = 1
+    config.SIGNAL_CACHE_SIZE = 3
+    return SignalCache(config)
+
+def test_repeat_within_cooldown_is_suppressed(cache):
+    assert cache.admit(signal(7), now=0)
+    assert not cache.admit(signal(7, candle=1), now=300)
+    assert cache.stats['suppressed'] == 1
+
+def test_stronger_score_realerts(cache):
+    assert cache.admit(signal(6), now=0)
+    assert cache.admit(signal(7), now=10)
+    # the bar to beat is the last alerted score
+    assert not cache.admit(signal(7), now=20)
+
+def test_directions_and_symbols_are_independent(cache):
+    assert cache.admit(signal(7), now=0)
+    assert cache.admit(signal(7, direction='SHORT'), now=1)
+    assert cache.admit(signal(7, symbol='ETH/USDT:USDT'), now=2)
+
+def test_alerts_again_after_cooldown_on_a_new_candle(cache):
+    assert cache.admit(signal(7, candle=0), now=0)
+    assert cache.admit(signal(7, candle=3), now=900)
+
+def test_same_candle_stays_suppressed_past_short_cooldown():
+    config = Config()
+    config.SIGNAL_COOLDOWN_SECONDS = 60
+    cache = SignalCache(config)
+    assert cache.admit(signal(7, candle=0), now=0)
+    assert not cache.admit(signal(7, candle=0), now=120)
+    assert cache.admit(signal(7, candle=1), now=120)
+
+def test_expired_and_evicted_entries(cache):
+    for i in range(4):
+        assert cache.admit(signal(7, symbol=f"S{i}"), now=i)
+    assert len(cache) == 3
+    assert cache.stats['evicted'] == 1
+    # the evicted symbol alerts again inside its cooldown
+    assert cache.admit(signal(7, symbol='S0'), now=5)
+    
+    cache.admit(signal(7, symbol='S9'), now=2000)
+    assert len(cache) == 1
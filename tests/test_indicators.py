@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from config import Config
+from analysis.candles import Candles
+from analysis.indicators import IndicatorEngine, calculate_indicators_batch
+from analysis.technical import TechnicalAnalyzer
+from benchmarks.bench_indicators import make_windows
+from benchmarks.check_indicators import KEYS, run
+
+def test_incremental_and_batch_match_ta():
+    assert run(symbols=2, bars=180, window=100, tolerance=1e-9)
+
+def test_engine_continues_sliding_windows_without_reseeding():
+    config = Config()
+    engine = IndicatorEngine(config)
+    ohlcv = make_windows(1, 130)[0]
+    
+    for end in range(100, 131):
+        engine.update('SYN', Candles.from_ohlcv(ohlcv[end - 100:end]))
+    assert engine.stats['reseeds'] == 1
+    assert engine.stats['bars_applied'] == 99 + 30
+    
+    # a window that no longer overlaps the state starts over
+    engine.update('SYN', Candles.from_ohlcv(make_windows(1, 100, seed=1)[0]))
+    assert engine.stats['reseeds'] == 2
+
+def test_batch_stacks_windows_of_different_length():
+    config = Config()
+    analyzer = TechnicalAnalyzer(config)
+    windows = [Candles.from_ohlcv(ohlcv) for ohlcv in make_windows(3, 100)]
+    windows.append(Candles.from_ohlcv(make_windows(1, 60, seed=3)[0]))
+    windows.append(None)
+    
+    batch = analyzer._calculate_indicators_batch(windows)
+    assert batch[-1] == {}
+    for candles, values in zip(windows[:-1], batch):
+        expected = analyzer._calculate_indicators(candles)
+        for key in KEYS:
+            assert values[key] == pytest.approx(expected[key], rel=1e-9, nan_ok=True)
+
+def test_short_window_is_undefined_like_ta():
+    config = Config()
+    ohlcv = np.asarray(make_windows(1, 20)[0]).T
+    values = calculate_indicators_batch(config, ohlcv[None, 2], ohlcv[None, 3], ohlcv[None, 4], ohlcv[None, 5])[0]
+    assert np.isnan(values['ema50'])
+    assert not np.isnan(values['ema9'])
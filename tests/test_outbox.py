@@ -0,0 +1,57 @@
+import asyncio
+
+from telegram.error import NetworkError, TimedOut
+
+from config import Config
+from bot.outbox import Outbox, merge_messages, telegram_length
+
+class FakeBot:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.sent = []
+        self.calls = 0
+    
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((chat_id, text))
+
+def make_config():
+    config = Config()
+    config.TELEGRAM_GLOBAL_RATE = 1000
+    config.TELEGRAM_CHAT_RATE = 1000
+    config.TELEGRAM_CHAT_BURST = 1000
+    config.TELEGRAM_MAX_RETRIES = 3
+    return config
+
+def deliver(bot) -> Outbox:
+    async def run():
+        outbox = Outbox(bot, make_config())
+        outbox.send(1, 'signal', kind='signal', signals=1)
+        await outbox.join()
+        return outbox
+    return asyncio.run(run())
+
+def test_timed_out_send_is_not_repeated():
+    bot = FakeBot([TimedOut()])
+    outbox = deliver(bot)
+    assert bot.calls == 1
+    assert outbox.stats['timed_out'] == 1
+    assert outbox.stats['retries'] == 0
+
+def test_connection_error_is_retried(monkeypatch):
+    async def no_sleep(delay):
+        pass
+    monkeypatch.setattr('bot.outbox.asyncio.sleep', no_sleep)
+    
+    bot = FakeBot([NetworkError('connection reset')])
+    outbox = deliver(bot)
+    assert bot.sent == [(1, 'signal')]
+    assert outbox.stats['retries'] == 1
+
+def test_merge_respects_utf16_limit():
+    messages = ['⚡' * 30] * 10
+    merged = merge_messages(messages, limit=200)
+    assert sum(count for _, count in merged) == 10
+    assert all(telegram_length(text) <= 200 for text, _ in merged)
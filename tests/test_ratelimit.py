@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from analysis.ratelimit import TokenBucket
+
+def timed(coro_factory) -> float:
+    async def run():
+        start = time.monotonic()
+        await coro_factory()
+        return time.monotonic() - start
+    return asyncio.run(run())
+
+def test_burst_is_free_then_rate_applies():
+    bucket = TokenBucket(rate=50, capacity=5)
+    
+    async def requests():
+        for _ in range(5):
+            assert await bucket.acquire() < 0.001
+        for _ in range(5):
+            await bucket.acquire()
+    
+    elapsed = timed(requests)
+    assert 0.09 <= elapsed < 0.3
+    assert bucket.stats['requests'] == 10
+    assert bucket.stats['waits'] == 5
+
+def test_heavy_request_is_served_and_borrows_from_next():
+    bucket = TokenBucket(rate=100, capacity=5)
+    
+    async def requests():
+        await bucket.acquire(weight=10)
+        # the overdraft of 5 tokens plus one more has to refill first
+        assert await bucket.acquire() >= 0.05
+    
+    timed(requests)
+    assert bucket.stats['weight'] == 11
+
+def test_penalty_pauses_all_requests():
+    bucket = TokenBucket(rate=100, capacity=100)
+    bucket.penalize(0.1)
+    
+    elapsed = timed(bucket.acquire)
+    assert elapsed >= 0.1
+    assert bucket.stats['penalties'] == 1
+
+def test_concurrent_waiters_share_the_rate():
+    bucket = TokenBucket(rate=100, capacity=1)
+    
+    async def requests():
+        await asyncio.gather(*(bucket.acquire() for _ in range(11)))
+    
+    elapsed = timed(requests)
+    assert 0.1 <= elapsed < 0.3
+
+def test_set_rate_caps_saved_tokens():
+    bucket = TokenBucket(rate=10, capacity=10)
+    bucket.set_rate(100, 2)
+    assert bucket.tokens <= 2
+    assert bucket.rate == 100
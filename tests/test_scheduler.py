@@ -0,0 +1,35 @@
+import pytest
+
+from bot.scheduler import next_scan_time
+
+CANDLE = 300
+SETTLE = 5
+CLOSE = 1_700_000_100 // CANDLE * CANDLE
+
+def schedule(interval: int, count: int, start: float = CLOSE + SETTLE) -> list:
+    times = []
+    now = start
+    for _ in range(count):
+        now = next_scan_time(now, interval, CANDLE, SETTLE)
+        times.append(now)
+    return times
+
+@pytest.mark.parametrize('interval, gap', [(120, 100), (60, 60), (90, 75), (100, 100), (299, 150)])
+def test_short_intervals_split_candle_evenly(interval, gap):
+    times = schedule(interval, 12)
+    assert all(b - a == pytest.approx(gap) for a, b in zip(times, times[1:]))
+    assert all(b - a <= interval for a, b in zip(times, times[1:]))
+    # every candle close (plus the settle delay) is still scanned
+    assert {CLOSE + SETTLE + k * CANDLE for k in range(1, 3)} <= set(times)
+
+@pytest.mark.parametrize('interval, gap', [(300, 300), (600, 600), (700, 600)])
+def test_long_intervals_skip_whole_candles(interval, gap):
+    times = schedule(interval, 5)
+    assert all(b - a == gap for a, b in zip(times, times[1:]))
+    assert all((t - SETTLE) % CANDLE == 0 for t in times)
+
+def test_scan_started_mid_candle_waits_for_next_slot():
+    assert next_scan_time(CLOSE + 30, 120, CANDLE, SETTLE) == CLOSE + SETTLE + 100
+    assert next_scan_time(CLOSE + 290, 120, CANDLE, SETTLE) == CLOSE + SETTLE + 300
+    # a call right at a slot moves on to the following one
+    assert next_scan_time(CLOSE + SETTLE + 100, 120, CANDLE, SETTLE) == CLOSE + SETTLE + 200
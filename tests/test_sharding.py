@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from config import Config
+from analysis.sharding import ShardCoordinator, assign_shards, shard_owner
+
+PAIRS = [f"SYN{i}/USDT:USDT" for i in range(1000)]
+WORKERS = ['w0', 'w1', 'w2', 'w3']
+
+def test_every_pair_has_exactly_one_owner():
+    shards = assign_shards(PAIRS, WORKERS)
+    assigned = [symbol for symbols in shards.values() for symbol in symbols]
+    assert sorted(assigned) == sorted(PAIRS)
+    
+    # ownership does not depend on the order pairs or workers are listed in
+    reordered = assign_shards(list(reversed(PAIRS)), list(reversed(WORKERS)))
+    assert {w: sorted(s) for w, s in reordered.items()} == {w: sorted(s) for w, s in shards.items()}
+
+def test_shards_are_balanced():
+    sizes = [len(symbols) for symbols in assign_shards(PAIRS, WORKERS).values()]
+    assert len(sizes) == len(WORKERS)
+    assert max(sizes) < 1.25 * len(PAIRS) / len(WORKERS)
+
+def test_removing_a_worker_only_moves_its_pairs():
+    before = {symbol: shard_owner(symbol, WORKERS) for symbol in PAIRS}
+    after = {symbol: shard_owner(symbol, WORKERS[:-1]) for symbol in PAIRS}
+    moved = [symbol for symbol in PAIRS if before[symbol] != after[symbol]]
+    assert moved and all(before[symbol] == WORKERS[-1] for symbol in moved)
+
+def test_adding_a_worker_only_takes_pairs_for_itself():
+    before = {symbol: shard_owner(symbol, WORKERS) for symbol in PAIRS}
+    after = {symbol: shard_owner(symbol, WORKERS + ['w4']) for symbol in PAIRS}
+    moved = [symbol for symbol in PAIRS if before[symbol] != after[symbol]]
+    assert all(after[symbol] == 'w4' for symbol in moved)
+    assert 0.1 < len(moved) / len(PAIRS) < 0.3
+
+@pytest.fixture
+def coordinator():
+    config = Config()
+    config.MARKET_CACHE_ENABLED = False
+    config.MAX_REQUESTS_PER_SECOND = 100
+    config.RATE_LIMIT_BURST = 20
+    config.SCAN_REQUEST_BUDGET = 400
+    return ShardCoordinator(config, scanner_factory=None)
+
+def test_limits_split_rate_and_budget_by_share(coordinator):
+    shards = assign_shards(PAIRS, WORKERS)
+    coordinator.round = {'universe': PAIRS, 'shards': shards}
+    
+    limits = {worker_id: coordinator._limits(worker_id) for worker_id in WORKERS}
+    assert sum(limit['rate'] for limit in limits.values()) == pytest.approx(100)
+    assert sum(limit['budget'] for limit in limits.values()) <= 400
+    for worker_id, limit in limits.items():
+        assert limit['rate'] == pytest.approx(100 * len(shards[worker_id]) / len(PAIRS))
+
+def test_penalty_reaches_every_worker_but_the_reporter(coordinator):
+    coordinator.workers = {worker_id: {} for worker_id in WORKERS}
+    coordinator.penalty_until = time.monotonic() + 10
+    coordinator.penalty_from = 'w0'
+    
+    assert coordinator._limits('w0')['penalty'] == 0.0
+    assert coordinator._limits('w1')['penalty'] > 9
+    assert coordinator._limits('w1')['rate'] == pytest.approx(25)
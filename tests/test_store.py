@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from config import Config
+from analysis.candles import CandleBuffer
+from analysis.fetcher import DataFetcher
+from analysis.store import CandleStore
+
+SYMBOL = 'BTC/USDT:USDT'
+TIMEFRAME_MS = 300_000
+
+def bars(last_open: int, count: int, skip=()) -> list:
+    # oldest first, every bar open is a multiple of the timeframe
+    return [
+        [last_open - i * TIMEFRAME_MS, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0 + i]
+        for i in range(count - 1, -1, -1) if i not in skip
+    ]
+
+@pytest.fixture
+def config(tmp_path):
+    config = Config()
+    config.CANDLE_STORE_ENABLED = True
+    config.CANDLE_STORE_PATH = str(tmp_path / 'candles.db')
+    config.MARKET_CACHE_ENABLED = False
+    return config
+
+def current_open(offset: int = 0) -> int:
+    now_ms = int(time.time() * 1000)
+    return now_ms - now_ms % TIMEFRAME_MS - offset * TIMEFRAME_MS
+
+def store_bars(config, ohlcv: list):
+    store = CandleStore(config)
+    store.append(SYMBOL, '5m', ohlcv)
+    store.close()
+
+def test_round_trip_keeps_newest_rows_and_final_bar(config):
+    last_open = current_open()
+    store = CandleStore(config)
+    store.append(SYMBOL, '5m', bars(last_open, 150))
+    # a bar stored while forming is overwritten by its final version
+    store.append(SYMBOL, '5m', [[last_open, 9.0, 9.0, 9.0, 9.0, 99.0]])
+    store.flush()
+    
+    loaded = store.load_recent('5m', 100, 0)[SYMBOL]
+    assert len(loaded) == 100
+    assert [c[0] for c in loaded] == [c[0] for c in bars(last_open, 100)]
+    assert loaded[-1] == [last_open, 9.0, 9.0, 9.0, 9.0, 99.0]
+    
+    history = store.load_history(SYMBOL, '5m')
+    assert len(history) == 150
+    store.close()
+
+def test_first_compaction_waits_one_interval(config):
+    store = CandleStore(config)
+    store.append(SYMBOL, '5m', bars(current_open(), 10))
+    store.flush()
+    assert store.stats['compactions'] == 0
+    
+    store.last_compaction -= config.CANDLE_STORE_COMPACT_HOURS * 3600
+    store.flush()
+    assert store.stats['compactions'] == 1
+    store.close()
+
+def test_warm_start_after_downtime_fills_gap(config):
+    limit = config.CANDLE_LIMITS['5m']
+    store_bars(config, bars(current_open(30), limit))
+    
+    fetcher = DataFetcher(config)
+    buffer = fetcher.candle_buffers[(SYMBOL, '5m')]
+    assert len(buffer.candles) == limit
+    assert not buffer.needs_full_refetch(int(time.time() * 1000))
+    fetcher.store.close()
+
+def test_warm_start_cuts_buffer_at_stored_gap(config):
+    limit = config.CANDLE_LIMITS['5m']
+    # an earlier downtime left a 13-bar hole inside the newest `limit` rows
+    store_bars(config, bars(current_open(5), limit + 13, skip=range(40, 53)))
+    
+    fetcher = DataFetcher(config)
+    buffer = fetcher.candle_buffers[(SYMBOL, '5m')]
+    timestamps = [c[0] for c in buffer.candles]
+    assert len(timestamps) == 40
+    assert all(b - a == TIMEFRAME_MS for a, b in zip(timestamps, timestamps[1:]))
+    assert buffer.needs_full_refetch(int(time.time() * 1000))
+    fetcher.store.close()
+
+def test_restore_keeps_contiguous_window():
+    buffer = CandleBuffer(TIMEFRAME_MS, 20)
+    assert buffer.restore(bars(current_open(), 20))
+    assert buffer.is_full()
+    
+    assert not buffer.restore(bars(current_open(), 20, skip=[3]))
+    assert len(buffer.candles) == 3
+
+def test_flush_writes_off_the_event_loop(config):
+    fetcher = DataFetcher(config)
+    threads = []
+    write = fetcher.store._write
+    
+    def record(rows):
+        threads.append(threading.get_ident())
+        write(rows)
+    fetcher.store._write = record
+    
+    async def scan():
+        fetcher._persist(SYMBOL, '5m', bars(current_open(), 10))
+        await fetcher.flush_store()
+        await fetcher.close()
+    asyncio.run(scan())
+    
+    assert threads and threads[0] != threading.get_ident()
+    assert fetcher.store.stats['rows_written'] == 10
@@ -0,0 +1,39 @@
+import itertools
+
+from config import Config
+from bot.handlers import BotHandlers
+
+PREFS = [
+    {},
+    {'min_score': 8},
+    {'min_score': 3, 'strong_only': True},
+    {'strong_only': True, 'notify_short': False},
+    {'notify_long': False, 'notify_short': False},
+    {'min_score': 9, 'notify_long': False},
+]
+
+def test_index_matches_should_send_signal():
+    config = Config()
+    handlers = BotHandlers(config, scanner=None)
+    for user_id, prefs in enumerate(PREFS):
+        handlers.user_settings[user_id] = prefs
+        handlers.subscriptions.update(user_id, prefs)
+    
+    for direction, score in itertools.product(('LONG', 'SHORT'), range(0, 12)):
+        strength = 'СИЛЬНЫЙ' if score >= config.STRONG_SIGNAL_SCORE else 'СРЕДНИЙ'
+        signal = {'direction': direction, 'score': score, 'strength': strength}
+        expected = {user_id for user_id in range(len(PREFS)) if handlers.should_send_signal(signal, user_id)}
+        assert set(handlers.subscriptions.match(direction, score)) == expected
+
+def test_update_and_remove_move_subscriber_between_buckets():
+    handlers = BotHandlers(Config(), scanner=None)
+    handlers.subscriptions.update(1, {'min_score': 5})
+    assert list(handlers.subscriptions.match('LONG', 5)) == [1]
+    
+    handlers.subscriptions.update(1, {'min_score': 9})
+    assert list(handlers.subscriptions.match('LONG', 5)) == []
+    assert list(handlers.subscriptions.match('SHORT', 9)) == [1]
+    
+    handlers.subscriptions.remove(1)
+    assert 1 not in handlers.subscriptions
+    assert handlers.subscriptions.index == {'LONG': {}, 'SHORT': {}}
@@ -0,0 +1,46 @@
+import pytest
+
+from config import Config
+from analysis.technical import TechnicalAnalyzer
+from benchmarks.bench_indicators import make_windows
+
+KEYS = ['ema9', 'ema21', 'ema50', 'rsi', 'atr', 'volume_sma']
+
+def make_data(window_5m, window_1m) -> dict:
+    return {
+        'symbol': 'SYN/USDT:USDT', 'ohlcv_5m': window_5m, 'ohlcv_1m': window_1m,
+        'orderbook': None, 'tick_size': 0.01
+    }
+
+def with_forming(window, delta: float) -> list:
+    window = [list(c) for c in window]
+    window[-1][4] += delta
+    window[-1][5] += delta
+    return window
+
+@pytest.fixture
+def analyzer():
+    config = Config()
+    config.INDICATOR_MODE = 'batch'
+    return TechnicalAnalyzer(config)
+
+def test_same_window_twice_is_not_seeded(analyzer):
+    data = make_data(make_windows(1, 100)[0], make_windows(1, 20, seed=7)[0])
+    first = analyzer.analyze_batch([data])[0]
+    # the lazy order book pass re-analyses the same fetched window in the same scan
+    second = analyzer.analyze_batch([data])[0]
+    
+    assert analyzer.memo == {}
+    assert second['indicators_5m'] == first['indicators_5m']
+
+def test_later_fetch_of_same_close_seeds_matching_state(analyzer):
+    window_5m, window_1m = make_windows(1, 100)[0], make_windows(1, 20, seed=7)[0]
+    analyzer.analyze_batch([make_data(window_5m, window_1m)])
+    
+    later = make_data(with_forming(window_5m, 0.5), with_forming(window_1m, 0.5))
+    memoized = analyzer.analyze_batch([later])[0]
+    assert ('SYN/USDT:USDT', '5m') in analyzer.memo
+    
+    fresh = TechnicalAnalyzer(analyzer.config).analyze_batch([later])[0]
+    for key in KEYS:
+        assert memoized['indicators_5m'][key] == pytest.approx(fresh['indicators_5m'][key], rel=1e-9)
@@ -0,0 +1,66 @@
+# Offline backtest of the signal scoring over local OHLCV history.
+# Usage: python -m tools.backtest data/ --horizon 288 --trades trades.csv
+#        python -m tools.backtest --store candles.db
+# data/ holds <MARKET>_5m.csv|parquet (and optionally <MARKET>_1m.*) with
+# timestamp,open,high,low,close,volume columns, timestamps in ms
+import argparse
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from analysis.backtest import Backtester
+from analysis.store import CandleStore
+from config import Config
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtest signal scoring on historical candles')
+    parser.add_argument('directory', nargs='?')
+    parser.add_argument('--store', help='read history from the scanner candle store instead')
+    parser.add_argument('--horizon', type=int, default=Config.BACKTEST_HORIZON_BARS,
+                        help='5m bars a trade stays open before closing at market')
+    parser.add_argument('--trades', help='write every simulated trade to this CSV file')
+    args = parser.parse_args()
+    if not args.directory and not args.store:
+        parser.error('a data directory or --store is required')
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    start = time.perf_counter()
+    backtester = Backtester(Config)
+    if args.store:
+        results = backtester.run_store(CandleStore(Config, args.store), args.horizon)
+    else:
+        results = backtester.run(args.directory, args.horizon)
+    elapsed = time.perf_counter() - start
+    
+    rows = []
+    for market_id, result in results.items():
+        summary = result['summary']
+        if summary['trades']:
+            print(f"{market_id:<16} trades {summary['trades']:>6}  long {summary['long']:>5}  "
+                  f"short {summary['short']:>5}  win {summary['win_rate']:5.1f}%  "
+                  f"avg R {summary['avg_r']:+.3f}  total R {summary['total_r']:+.1f}")
+        else:
+            print(f"{market_id:<16} no trades")
+        
+        trades = result['trades']
+        rows.append(pd.DataFrame({
+            'symbol': market_id,
+            'timestamp': trades['timestamp'].astype(np.int64),
+            'direction': np.where(trades['direction'] > 0, 'LONG', 'SHORT'),
+            'pnl_pct': trades['pnl_pct'],
+            'r_multiple': trades['r_multiple']
+        }))
+    
+    trades = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+    bars = sum(result['bars'] for result in results.values())
+    print(f"\n{len(results)} pairs, {bars} bars, {len(trades)} trades in {elapsed:.2f}s")
+    
+    if len(trades):
+        print(f"win rate {(trades['r_multiple'] > 0).mean() * 100:.1f}%  "
+              f"avg R {trades['r_multiple'].mean():+.3f}  total R {trades['r_multiple'].sum():+.1f}")
+    
+    if args.trades:
+        trades.to_csv(args.trades, index=False)
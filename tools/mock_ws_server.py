@@ -0,0 +1,164 @@
+# Offline stand-in for the BingX swap market WebSocket.
+# Usage: python -m tools.mock_ws_server --port 8765 --bar-seconds 5
+# then run the bot with STREAM_MODE=true STREAM_URL=ws://127.0.0.1:8765/swap-market
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+import logging
+
+from aiohttp import web, WSMsgType
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAME_MS = {'1m': 60_000, '5m': 300_000}
+
+class MockMarket:
+    def __init__(self, bar_seconds: float, history: int, seed: int = 7):
+        # a 5m bar lasts bar_seconds of wall time; the feed clock runs that much faster
+        self.speed = 300 / bar_seconds
+        self.started_real = time.time()
+        self.started_virtual = int(time.time() * 1000)
+        self.history = history
+        self.rng = random.Random(seed)
+        self.prices = {}
+        self.candles = {}
+    
+    def now_ms(self) -> int:
+        return int(self.started_virtual + (time.time() - self.started_real) * self.speed * 1000)
+    
+    def tick(self, market_id: str) -> float:
+        price = self.prices.get(market_id, self.rng.uniform(1, 1000))
+        price *= 1 + self.rng.gauss(0, 0.001)
+        self.prices[market_id] = price
+        return price
+    
+    def kline(self, market_id: str, timeframe: str, price: float) -> dict:
+        step = TIMEFRAME_MS[timeframe]
+        open_time = self.now_ms() // step * step
+        key = (market_id, timeframe)
+        candle = self.candles.get(key)
+        
+        if candle is None or candle['T'] != open_time:
+            candle = {'T': open_time, 'o': price, 'h': price, 'l': price, 'c': price, 'v': 0.0}
+            self.candles[key] = candle
+        
+        candle['h'] = max(candle['h'], price)
+        candle['l'] = min(candle['l'], price)
+        candle['c'] = price
+        candle['v'] += self.rng.uniform(1, 50)
+        return {k: str(v) if k != 'T' else v for k, v in candle.items()}
+    
+    def history_klines(self, market_id: str, timeframe: str) -> list:
+        step = TIMEFRAME_MS[timeframe]
+        current = self.now_ms() // step * step
+        price = self.prices.setdefault(market_id, self.rng.uniform(1, 1000))
+        klines = []
+        
+        for i in range(self.history, 0, -1):
+            open_price = price * (1 + self.rng.gauss(0, 0.002))
+            close_price = open_price * (1 + self.rng.gauss(0, 0.002))
+            klines.append({
+                'T': current - i * step,
+                'o': str(open_price),
+                'h': str(max(open_price, close_price) * (1 + abs(self.rng.gauss(0, 0.001)))),
+                'l': str(min(open_price, close_price) * (1 - abs(self.rng.gauss(0, 0.001)))),
+                'c': str(close_price),
+                'v': str(self.rng.uniform(100, 5000))
+            })
+        
+        return klines
+    
+    def depth(self, market_id: str, levels: int) -> dict:
+        price = self.prices.get(market_id, 100.0)
+        tick = price * 0.0001
+        return {
+            'bids': [[str(price - (i + 1) * tick), str(self.rng.uniform(1, 100))] for i in range(levels)],
+            'asks': [[str(price + (i + 1) * tick), str(self.rng.uniform(1, 100))] for i in range(levels)]
+        }
+
+def encode(payload) -> bytes:
+    text = payload if isinstance(payload, str) else json.dumps(payload)
+    return gzip.compress(text.encode())
+
+async def handle_connection(request: web.Request) -> web.WebSocketResponse:
+    market: MockMarket = request.app['market']
+    interval = request.app['interval']
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    
+    subscriptions = set()
+    
+    async def reader():
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT or msg.data == 'Pong':
+                continue
+            request_msg = json.loads(msg.data)
+            if request_msg.get('reqType') != 'sub':
+                continue
+            
+            topic = request_msg['dataType']
+            subscriptions.add(topic)
+            await ws.send_bytes(encode({'id': request_msg.get('id'), 'code': 0, 'msg': ''}))
+            
+            market_id, _, channel = topic.partition('@')
+            if channel.startswith('kline_'):
+                timeframe = channel[len('kline_'):]
+                for kline in market.history_klines(market_id, timeframe):
+                    await ws.send_bytes(encode({'code': 0, 'dataType': topic, 's': market_id, 'data': [kline]}))
+    
+    reader_task = asyncio.create_task(reader())
+    last_ping = time.monotonic()
+    
+    try:
+        while not ws.closed:
+            await asyncio.sleep(interval)
+            
+            if time.monotonic() - last_ping > 5:
+                await ws.send_bytes(encode('Ping'))
+                last_ping = time.monotonic()
+            
+            prices = {}
+            for topic in list(subscriptions):
+                market_id, _, channel = topic.partition('@')
+                if market_id not in prices:
+                    prices[market_id] = market.tick(market_id)
+                
+                if channel.startswith('kline_'):
+                    data = [market.kline(market_id, channel[len('kline_'):], prices[market_id])]
+                elif channel.startswith('depth'):
+                    levels = int(channel[len('depth'):].split('@')[0] or 20)
+                    data = market.depth(market_id, levels)
+                else:
+                    continue
+                
+                await ws.send_bytes(encode({'code': 0, 'dataType': topic, 's': market_id, 'data': data}))
+    except ConnectionResetError:
+        pass
+    finally:
+        reader_task.cancel()
+    
+    return ws
+
+def build_app(bar_seconds: float, interval: float, history: int) -> web.Application:
+    app = web.Application()
+    app['market'] = MockMarket(bar_seconds, history)
+    app['interval'] = interval
+    app.router.add_get('/swap-market', handle_connection)
+    return app
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mock BingX swap market WebSocket server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--bar-seconds', type=float, default=300,
+                        help='wall-clock seconds per 5m candle (300 = real time)')
+    parser.add_argument('--interval', type=float, default=0.5, help='seconds between pushes')
+    parser.add_argument('--history', type=int, default=100,
+                        help='closed candles replayed on subscribe so buffers fill offline')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(build_app(args.bar_seconds, args.interval, args.history), host=args.host, port=args.port)